@@ -30,6 +30,7 @@ ONLY from the environment and are NEVER logged.
 """
 from __future__ import annotations
 
+import functools
 import logging
 from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
@@ -113,10 +114,17 @@ def create_app(
         if state.promo_location_id is None:
             state.promo_location_id = state.config.promo_location_id
         if state.transport_factory is None:
-            cfg = state.config
-            state.transport_factory = lambda: ShopifyTransport(cfg)
+            # ONE transport for the process: every job and route reuses the same
+            # requests.Session, i.e. the same warm keep-alive TLS connection to
+            # the store, and the throttle spans all of them (not one per job).
+            shared_transport = ShopifyTransport(state.config)
+            state.transport_factory = lambda: shared_transport
         if state.sheet_factory is None:
-            state.sheet_factory = ScansiaSheet.open
+            # ONE worksheet handle for the process, opened on first use: the
+            # service-account auth + open_by_key + worksheet lookup round-trips
+            # are paid once, not on every route/job. A failed open is not
+            # cached, so the next call retries it.
+            state.sheet_factory = functools.lru_cache(maxsize=1)(ScansiaSheet.open)
         if state.audit_factory is None:
             state.audit_factory = lambda: GSheetAuditSink.from_scansia_sheet(state.sheet_factory())
         if state.executor is None:
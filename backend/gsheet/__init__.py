@@ -16,6 +16,8 @@ is ever logged.
 """
 from __future__ import annotations
 
+import json
+import os
 from typing import Any, Optional
 
 from backend.config import ConfigError
@@ -59,9 +61,6 @@ class ScansiaSheet(ReaderMixin, WriterMixin):
     @classmethod
     def open(cls) -> "ScansiaSheet":
         """Open the configured worksheet via gspread (env-only, fail-closed)."""
-        import json
-        import os
-
         import gspread  # lazy: keeps import-time + tests network/credential-free
         from google.oauth2.service_account import Credentials
 
@@ -42,13 +42,19 @@ ANOMALY_MISSING_UUID_ASSIGNED = "missing_uuid_assigned"
 # online=SI synonym set — verbatim from sync._truthy_si (sync.py:69).
 DEFAULT_SI_SET = frozenset({"si", "sì", "true", "1", "x", "ok", "yes"})
 
+# Everything a price cell may carry besides digits and separators ('€', spaces).
+_PRICE_JUNK = re.compile(r"[^\d,\.]")
+
+# '-' and ' ' -> '_' in a single translate pass (header normalization).
+_NORM_TRANS = str.maketrans("- ", "__")
+
 
 # ---------------------------------------------------------------------------
 # Pure helpers (no I/O, unit-testable in isolation).
 # ---------------------------------------------------------------------------
 def _norm_key(k: Any) -> str:
     """Normalize a header/key. Verbatim from sync._norm_key (sync.py:43-45)."""
-    return (k or "").strip().lower().replace("-", "_").replace(" ", "_")
+    return (k or "").strip().lower().translate(_NORM_TRANS)
 
 
 def _clean_price(v: Any) -> Optional[str]:
@@ -61,8 +67,10 @@ def _clean_price(v: Any) -> Optional[str]:
     s = str(v).strip()
     if not s:
         return None
-    s2 = re.sub(r"[^\d,\.]", "", s)
-    if s2.count(",") == 1 and s2.count(".") == 0:
+    if s.replace(".", "", 1).isdecimal():
+        return f"{float(s):.2f}"  # common case: already '129' / '129.90'
+    s2 = _PRICE_JUNK.sub("", s)
+    if s2.count(",") == 1 and "." not in s2:
         s2 = s2.replace(",", ".")
     try:
         return f"{float(s2):.2f}"
@@ -78,12 +86,12 @@ def _truthy_si(v: Any, allowed: frozenset = DEFAULT_SI_SET) -> bool:
     """
     if v is True:
         return True
+    if isinstance(v, str):  # common case: gspread cells are strings
+        return v.strip().lower() in allowed
     if isinstance(v, bool):  # v is False
         return False
     if isinstance(v, (int, float)):
         return int(v) == 1
-    if isinstance(v, str):
-        return v.strip().lower() in allowed
     return False
 
 
@@ -406,12 +406,22 @@ def _variant_size(selected_options: List[Dict[str, Any]]) -> Optional[str]:
     return None
 
 
-def _build_snapshot(transport: Any, product_gid: str) -> BeforeSnapshot:
-    """Assemble the reconstructive before-snapshot from four READ ops."""
-    core = ops.get_product_core(transport, product_gid)
-    variants = ops.get_product_variants(transport, product_gid)
-    metafields = ops.get_product_metafields(transport, product_gid)
-    images = ops.get_product_media(transport, product_gid)
+def _build_snapshot(
+    transport: Any, product_gid: str, core: Optional[Dict[str, Any]] = None
+) -> BeforeSnapshot:
+    """Assemble the reconstructive before-snapshot from ONE fused READ
+    (:func:`ops.get_product_bundle`: core + variants + metafields + media).
+
+    ``core``: an already-fetched :func:`ops.get_product_core` result for THIS
+    product (the single-delete outlet gate reads it moments earlier) — passed
+    to the bundle, which then skips its core/collections part, so the snapshot
+    records exactly the state the gate judged; ``None`` -> the bundle's core.
+    """
+    bundle = ops.get_product_bundle(transport, product_gid, core=core)
+    core = bundle["core"]
+    variants = bundle["variants"]
+    metafields = bundle["metafields"]
+    images = bundle["media"]
 
     snap_variants = tuple(
         SnapshotVariant(
@@ -454,7 +464,10 @@ def resolve_is_outlet(transport: Any, product_gid: str) -> bool:
     the single-delete escape hatch never has a SKU, only an operator-typed
     ``product_gid``. One :func:`ops.get_product_core` read; no mutation.
     """
-    core = ops.get_product_core(transport, product_gid)
+    return _core_is_outlet(ops.get_product_core(transport, product_gid))
+
+
+def _core_is_outlet(core: Dict[str, Any]) -> bool:
     title = core.get("title") or ""
     is_member = any(
         c.get("id") == ops.OUTLET_COLLECTION_GID for c in (core.get("collections") or [])
@@ -463,17 +476,21 @@ def resolve_is_outlet(transport: Any, product_gid: str) -> bool:
     return is_member or title_is_outlet
 
 
-def require_single_delete_target_is_outlet(transport: Any, product_gid: str) -> None:
+def require_single_delete_target_is_outlet(transport: Any, product_gid: str) -> Dict[str, Any]:
     """Fail-closed HARDENING gate (post-review) for the single-delete escape
     hatch: raises :class:`SingleDeleteNotOutletError` if ``product_gid`` does
     NOT resolve as an outlet (see :func:`resolve_is_outlet`). Called BOTH
     synchronously by the API endpoint (before any job/``product_delete`` is
     reachable) AND, as belt-and-braces, from :func:`delete_single_apply` itself.
+    Returns the :func:`ops.get_product_core` read it judged, so the snapshot
+    that follows can reuse it.
     """
-    if not resolve_is_outlet(transport, product_gid):
+    core = ops.get_product_core(transport, product_gid)
+    if not _core_is_outlet(core):
         raise SingleDeleteNotOutletError(
             f"single-delete target does not resolve to an outlet: {product_gid}"
         )
+    return core
 
 
 def _require_gesture(human_gesture: Optional[str], count: int) -> None:
@@ -514,11 +531,13 @@ def _delete_one(
     archive_first: bool,
     writeback_field: str,
     writeback_value: Any,
+    core: Optional[Dict[str, Any]] = None,
 ) -> DeleteOutcome:
     """Snapshot -> durable write (ABORT gate) -> [archive?] -> delete -> write-back.
 
     The durable write is the ONLY gate: if it raises, ``product_delete`` is NEVER
-    reached (:data:`STATUS_SNAPSHOT_ABORTED`).
+    reached (:data:`STATUS_SNAPSHOT_ABORTED`). ``core`` is forwarded to
+    :func:`_build_snapshot` (a caller that already read it skips the re-read).
     """
     warnings: List[str] = []
 
@@ -527,7 +546,7 @@ def _delete_one(
     #     this outlet cleanly rather than propagate and abort the whole batch
     #     (e.g. a malformed non-null Shopify response -> KeyError/TypeError).
     try:
-        snapshot = _build_snapshot(transport, product_gid)
+        snapshot = _build_snapshot(transport, product_gid, core)
     except Exception as e:  # noqa: BLE001 - pre-delete, graceful per-outlet skip
         return DeleteOutcome(
             product_gid, STATUS_SNAPSHOT_BUILD_FAILED,
@@ -727,11 +746,12 @@ def delete_single_apply(
     is refused, never deleted.
     """
     _require_gesture(human_gesture, 1)
-    require_single_delete_target_is_outlet(transport, product_gid)
+    core = require_single_delete_target_is_outlet(transport, product_gid)
     gid_rows = _sheet_gid_index(sheet)
     return _delete_one(
         transport, sheet, audit_sink, product_gid, gid_rows,
         archive_first=False, writeback_field=writeback_field, writeback_value=writeback_value,
+        core=core,
     )
 
 
@@ -747,7 +767,7 @@ def deny_normalize(transport: Any, product_gid: str) -> int:
     delete predicate. Returns the number of variants normalized. Confirm-gated
     upstream (it is a live mutation, never called from a preview).
     """
-    variants = ops.get_product_variants(transport, product_gid)
+    variants = ops.get_product_variant_prices(transport, product_gid)
     updates = [{"id": v["id"], "inventoryPolicy": _DENY} for v in variants]
     ops.product_variants_bulk_update(transport, product_gid, updates)
     return len(updates)
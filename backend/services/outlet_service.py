@@ -375,7 +375,8 @@ def _nonpub(
 
 
 def _plan_action_for_sku(
-    sku: str, group_rows: List[Any], transport: Any, promo_id: str
+    sku: str, group_rows: List[Any], transport: Any, promo_id: str,
+    prefetched: Optional[resolvers.Prefetched] = None,
 ) -> PlanAction:
     warnings: List[str] = []
     first = group_rows[0]
@@ -385,7 +386,7 @@ def _plan_action_for_sku(
     )
     q_gid = next((r.product_id for r in group_rows if r.product_id), "")
 
-    outlet_res = resolvers.outlet_resolver(transport, sku)
+    outlet_res = resolvers.outlet_resolver(transport, sku, prefetched)
     if outlet_res.get("warning"):
         warnings.append(outlet_res["warning"])
     outlet_matches = outlet_res.get("matches") or []
@@ -422,7 +423,7 @@ def _plan_action_for_sku(
         )
 
     # MATCH step 3: no outlet -> source -> CREATE (or surface no-source).
-    source_res = resolvers.source_resolver(transport, sku)
+    source_res = resolvers.source_resolver(transport, sku, prefetched)
     if source_res.get("warning"):
         warnings.append(source_res["warning"])
     src_matches = source_res.get("matches") or []
@@ -528,7 +529,12 @@ def _create_action(
 
 def _build_actions(rows: List[Any], transport: Any, promo_id: str) -> List[PlanAction]:
     """Group canonical rows by SKU; plan every group carrying >=1 non-reconciled
-    row (the return signal). Fully-reconciled groups produce no action."""
+    row (the return signal). Fully-reconciled groups produce no action.
+
+    The candidate lookups of all planned SKUs are fetched up front in batched
+    OR queries (:func:`resolvers.prefetch_candidates`); each SKU's outlet AND
+    source resolution then reuse that single live read.
+    """
     groups: Dict[str, List[Any]] = {}
     order: List[str] = []
     for r in rows:
@@ -539,13 +545,12 @@ def _build_actions(rows: List[Any], transport: Any, promo_id: str) -> List[PlanA
             groups[sku] = []
             order.append(sku)
         groups[sku].append(r)
-    actions: List[PlanAction] = []
-    for sku in order:
-        grp = groups[sku]
-        if not any(not r.reconciled for r in grp):
-            continue
-        actions.append(_plan_action_for_sku(sku, grp, transport, promo_id))
-    return actions
+    planned = [sku for sku in order if any(not r.reconciled for r in groups[sku])]
+    prefetched = resolvers.prefetch_candidates(transport, planned)
+    return [
+        _plan_action_for_sku(sku, groups[sku], transport, promo_id, prefetched.get(sku))
+        for sku in planned
+    ]
 
 
 # =============================================================================
@@ -590,21 +595,39 @@ def _execute_create(fresh: PlanAction, sheet, transport, promo_id: str, get_pub)
         warns.append("quarantine:levels_truncated_after_duplicate")
         return ApplyOutcome(fresh.sku, BRANCH_CREATE, "QUARANTINED", new_gid, tuple(warns), ())
 
-    # (2) FIX1: zero + disconnect EVERY non-Promo location the duplicate inherited.
-    for v in inv:
-        item = _item_id(v)
-        for lvl in v.get("levels") or []:
-            loc = lvl.get("location_id")
-            if loc and loc != promo_id:
-                ops.inventory_set_quantities(transport, item, loc, 0)
-                ops.inventory_deactivate(transport, item, loc)
-
-    # (3) zero ALL variants at Promo (kills inherited stock on non-returned sizes).
+    # (2) FIX1: zero + disconnect EVERY non-Promo location the duplicate inherited
+    # — all zeros in one batch first (deactivation needs on_hand == 0), then each
+    # level is disconnected by the id the inventory read already returned.
+    inherited = [
+        (_item_id(v), lvl["location_id"], lvl.get("level_id"))
+        for v in inv
+        for lvl in v.get("levels") or []
+        if lvl.get("location_id") and lvl["location_id"] != promo_id
+    ]
+    ops.inventory_set_quantities_bulk(transport, [(item, loc, 0) for item, loc, _ in inherited])
+    for item, loc, level_id in inherited:
+        ops.inventory_deactivate(transport, item, loc, level_id)
+
+    # (3) zero ALL variants at Promo (kills inherited stock on non-returned sizes)
+    # — one batched mutation for the variants already stocked there; the rest are
+    # connected straight at on_hand=0 (the read says so: no failed batch +
+    # per-item activate/retry round).
+    at_promo = {
+        _item_id(v) for v in inv
+        if any(lvl.get("location_id") == promo_id for lvl in v.get("levels") or [])
+    }
     for v in inv:
-        ops.inventory_set_quantities(transport, _item_id(v), promo_id, 0)
+        if _item_id(v) not in at_promo:
+            ops.inventory_activate(transport, _item_id(v), promo_id, on_hand=0)
+    ops.inventory_set_quantities_bulk(
+        transport, [(_item_id(v), promo_id, 0) for v in inv if _item_id(v) in at_promo]
+    )
 
-    # (4) set the return delta ONLY on returned sizes (pre == 0 -> target == delta).
+    # (4) set the return delta ONLY on returned sizes (pre == 0 -> target == delta),
+    # again as one batch; rows are marked once the batch has landed.
     idx = _variant_size_index(inv)
+    deltas: List[Tuple[str, str, int]] = []
+    applied: List[SizeTarget] = []
     for st in fresh.size_targets:
         if st.delta <= 0:
             continue
@@ -612,7 +635,10 @@ def _execute_create(fresh: PlanAction, sheet, transport, promo_id: str, get_pub)
         if v is None:
             warns.append(f"unmatched_size:{st.raw_size}")
             continue
-        ops.inventory_set_quantities(transport, _item_id(v), promo_id, st.delta)
+        deltas.append((_item_id(v), promo_id, st.delta))
+        applied.append(st)
+    ops.inventory_set_quantities_bulk(transport, deltas)
+    for st in applied:
         for u in st.row_uuids:
             _mark(sheet, u, fresh.sku, reconciled, warns)
 
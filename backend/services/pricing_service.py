@@ -490,7 +490,7 @@ def _plan_group(
                      live_status=live_status)
 
     # --- live diff (sheet<->live) ---
-    variants = ops.get_product_variants(transport, gid)
+    variants = ops.get_product_variant_prices(transport, gid)
     if not variants:
         warnings.append("no_variants")
         return _skip(sku, gid, STATUS_NOT_FOUND, price=price, compare_at=compare_at,
@@ -765,7 +765,7 @@ def discharge_debt_count(
             continue
         scanned += 1
         try:
-            variants = ops.get_product_variants(transport, m["id"])
+            variants = ops.get_product_variant_prices(transport, m["id"])
         except _CAUGHT:
             continue  # best-effort recon: an unreadable product is not counted
         prod_broken = sum(
@@ -39,6 +39,9 @@ OUTLET_COLLECTION_GID = "gid://shopify/Collection/650952442188"
 CANDIDATE_PAGE_SIZE = 100
 # variants(first:) per candidate — shoe size ladders stay well under this.
 VARIANTS_PAGE_SIZE = 100
+# SKUs OR-ed into one batched candidate query by :func:`prefetch_candidates`.
+# The union of their candidate sets must fit ONE page for the batch to count.
+CANDIDATE_BATCH_SIZE = 10
 
 
 # Single candidate-fetch query. ``$q`` (the "sku:<value>" search) and the outlet
@@ -105,7 +108,16 @@ def _resolve_candidates(
        ``review`` when the two disagree (smart-collection reindex lag, or "outlet"
        as an incidental substring).
     """
-    q = "sku:" + _escape(sku)
+    edges, truncated = _fetch_candidate_edges(transport, "sku:" + _escape(sku))
+    candidates = _classify_candidates(edges, sku)
+    return candidates, {"server_count": len(edges), "truncated": truncated}
+
+
+def _fetch_candidate_edges(
+    transport: ShopifyTransport, q: str
+) -> Tuple[List[Dict[str, Any]], bool]:
+    """Stage 1 — run the candidate query for search string ``q``; return the raw
+    product edges and ``pageInfo.hasNextPage``."""
     data = transport.graphql(
         _CANDIDATE_QUERY,
         {
@@ -116,9 +128,12 @@ def _resolve_candidates(
         },
     )
     connection = data["products"]
-    edges = connection["edges"]
     truncated = bool(connection.get("pageInfo", {}).get("hasNextPage"))
+    return connection["edges"], truncated
 
+
+def _classify_candidates(edges: List[Dict[str, Any]], sku: str) -> List[Dict[str, Any]]:
+    """Stages 2-4 — exact-verify, dedup and classify ``edges`` against ``sku``."""
     by_gid: "Dict[str, Dict[str, Any]]" = {}
     for edge in edges:
         node = edge["node"]
@@ -158,7 +173,47 @@ def _resolve_candidates(
             "matched_variant_gids": matched,
         }
 
-    return list(by_gid.values()), {"server_count": len(edges), "truncated": truncated}
+    return list(by_gid.values())
+
+
+Prefetched = Tuple[List[Dict[str, Any]], Dict[str, Any]]
+
+
+def prefetch_candidates(transport: ShopifyTransport, skus: List[str]) -> Dict[str, Prefetched]:
+    """Batched :func:`_resolve_candidates` for many SKUs: ``{sku: (candidates, meta)}``.
+
+    SKUs are OR-ed ``CANDIDATE_BATCH_SIZE`` at a time into ONE candidate query
+    (``(sku:A) OR (sku:B) ...``) and each SKU is exact-verified against the shared
+    edges, so K SKUs cost ~K/10 round trips instead of K. The batch result is
+    only trusted where it is provably identical to the single-SKU query:
+
+    * the OR union is a superset of every member's own candidate set, so an
+      UN-truncated union page holds each SKU's complete set (never truncated);
+    * a truncated union, or a SKU with NO exact candidate in it (whose
+      ``NO_EXACT`` diagnostic needs its own raw server count), falls back to the
+      single-SKU query for that SKU.
+
+    A SKU with exact candidates gets ``server_count == len(candidates)``
+    (``server_count`` is only read when nothing survived exact-verify, which
+    always takes the single-SKU path). READ-ONLY; same no-cache contract as the
+    resolvers — the result is returned, never stored.
+    """
+    unique = list(dict.fromkeys(s for s in skus if s))
+    out: Dict[str, Prefetched] = {}
+    for i in range(0, len(unique), CANDIDATE_BATCH_SIZE):
+        chunk = unique[i:i + CANDIDATE_BATCH_SIZE]
+        if len(chunk) == 1:
+            out[chunk[0]] = _resolve_candidates(transport, chunk[0])
+            continue
+        q = " OR ".join(f"(sku:{_escape(sku)})" for sku in chunk)
+        edges, truncated = _fetch_candidate_edges(transport, q)
+        for sku in chunk:
+            candidates = [] if truncated else _classify_candidates(edges, sku)
+            if candidates:
+                out[sku] = (candidates, {"server_count": len(candidates), "truncated": False})
+            else:
+                out[sku] = _resolve_candidates(transport, sku)
+    return out
 
 
 def _build_result(
@@ -218,7 +273,9 @@ def _build_result(
     return {"matches": matches, "warning": warning, "truncated": bool(meta["truncated"])}
 
 
-def outlet_resolver(transport: ShopifyTransport, sku: str) -> Dict[str, Any]:
+def outlet_resolver(
+    transport: ShopifyTransport, sku: str, prefetched: Optional[Prefetched] = None
+) -> Dict[str, Any]:
     """Resolve the OUTLET product(s) carrying ``sku``.
 
     Keeps candidates where ``is_outlet_member OR title_is_outlet``: membership is
@@ -226,9 +283,10 @@ def outlet_resolver(transport: ShopifyTransport, sku: str) -> Dict[str, Any]:
     that catches a DRAFT/reindex-lag outlet before the smart-rule updates (such a
     title-only outlet is included but flagged ``review=True``). Returns
     ``{"matches": [...], "warning": str | None}`` — every distinct outlet is
-    returned (``MULTI_OUTLET`` warning, no auto-pick).
+    returned (``MULTI_OUTLET`` warning, no auto-pick). ``prefetched``: this SKU's
+    entry from :func:`prefetch_candidates` (skips the per-SKU query).
     """
-    candidates, meta = _resolve_candidates(transport, sku)
+    candidates, meta = prefetched or _resolve_candidates(transport, sku)
     return _build_result(
         candidates,
         meta,
@@ -238,7 +296,9 @@ def outlet_resolver(transport: ShopifyTransport, sku: str) -> Dict[str, Any]:
     )
 
 
-def source_resolver(transport: ShopifyTransport, sku: str) -> Dict[str, Any]:
+def source_resolver(
+    transport: ShopifyTransport, sku: str, prefetched: Optional[Prefetched] = None
+) -> Dict[str, Any]:
     """Resolve the full-price SOURCE product(s) carrying ``sku``.
 
     Keeps candidates where ``NOT is_outlet_member AND NOT title_is_outlet``: a
@@ -248,8 +308,9 @@ def source_resolver(transport: ShopifyTransport, sku: str) -> Dict[str, Any]:
     collection catches up, the direct fix for the legacy ``handle.endswith('-outlet')``
     that leaked such outlets through as "source". Returns
     ``{"matches": [...], "warning": str | None}`` (``MULTI_SOURCE`` on >1).
+    ``prefetched`` as in :func:`outlet_resolver`.
     """
-    candidates, meta = _resolve_candidates(transport, sku)
+    candidates, meta = prefetched or _resolve_candidates(transport, sku)
     return _build_result(
         candidates,
         meta,
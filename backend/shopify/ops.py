@@ -3,7 +3,10 @@
 Every function is a pure, stateless wrapper around a single GraphQL
 operation. The first argument is always a ``ShopifyTransport`` (see
 ``backend.shopify.transport``); the wrapper only calls
-``transport.graphql(query, variables)`` and shapes the result. No module-level
+``transport.graphql(query, variables)`` and shapes the result, so any object
+with that method and return shape (``data`` dict, raising on transport-level
+errors) works too — the legacy ``src.sync.Shopify`` client is passed in
+directly for the inventory ops. No module-level
 state, no HTTP session ownership, no secrets — those all live in the transport.
 
 M1a migration notes (authoritative source: ``src/sync.py`` legacy methods):
@@ -32,7 +35,8 @@ service layer, NOT here.
 """
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional
+import operator
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 from backend.shopify.transport import ShopifyTransport
 
@@ -40,6 +44,11 @@ from backend.shopify.transport import ShopifyTransport
 METAFIELDS_SET_MAX = 25
 # Single-page connection cap used by the read queries (matches legacy first:250).
 CONNECTION_PAGE_SIZE = 250
+# inventorySetQuantities cap on quantities per call.
+INVENTORY_SET_BATCH_SIZE = 250
+# Aliased inventoryDeactivate fields per document (10 points each: well under
+# the 1000-point single-query cap).
+INVENTORY_DEACTIVATE_BATCH_SIZE = 50
 
 
 class ShopifyUserError(RuntimeError):
@@ -71,6 +80,10 @@ def _check_user_errors(data: Dict[str, Any], mutation_key: str) -> Dict[str, Any
     return payload
 
 
+# ``edge -> edge["node"]`` for flattening connections (lookup runs in C).
+_node = operator.itemgetter("node")
+
+
 # =============================================================================
 # Products
 # =============================================================================
@@ -147,7 +160,34 @@ def get_product_variants(transport: ShopifyTransport, product_gid: str) -> List[
     if node is None:
         raise RuntimeError(f"Product not found for GID: {product_gid}")
     edges = node["variants"]["edges"]
-    return [e["node"] for e in edges]
+    return list(map(_node, edges))
+
+
+_GET_PRODUCT_VARIANT_PRICES = """
+query($id: ID!) {
+  node(id: $id) {
+    ... on Product {
+      variants(first: 250) {
+        edges { node { id price compareAtPrice } }
+      }
+    }
+  }
+}"""
+
+
+def get_product_variant_prices(transport: ShopifyTransport, product_gid: str) -> List[Dict[str, Any]]:
+    """Price projection of :func:`get_product_variants`: ``{id, price,
+    compareAtPrice}`` per variant (first 250, single page).
+
+    For callers that only diff or rewrite prices/policy by variant ``id``: the
+    server skips the sku/title/options/inventory-item resolution and the
+    response is a fraction of the full read. Same product-not-found error.
+    """
+    data = transport.graphql(_GET_PRODUCT_VARIANT_PRICES, {"id": product_gid})
+    node = data.get("node")
+    if node is None:
+        raise RuntimeError(f"Product not found for GID: {product_gid}")
+    return list(map(_node, node["variants"]["edges"]))
 
 
 _PRODUCT_VARIANTS_BULK_UPDATE = """
@@ -195,12 +235,12 @@ def variants_bulk_update_prices(
 ) -> Optional[Dict[str, Any]]:
     """Convenience helper: broadcast the SAME price + compareAtPrice to every variant.
 
-    Fetches the product's variants (:func:`get_product_variants`) then builds one
+    Fetches the product's variant ids (:func:`get_product_variant_prices`) then builds one
     ``ProductVariantsBulkInput`` per existing variant with identical ``price``
     and ``compareAtPrice`` (sync.py:443-467). ``compare_at`` may be ``None`` and
     flows through as ``null`` (clears compare-at). Empty product => no-op.
     """
-    variants = get_product_variants(transport, product_gid)
+    variants = get_product_variant_prices(transport, product_gid)
     updates = [
         {"id": v["id"], "price": price, "compareAtPrice": compare_at} for v in variants
     ]
@@ -235,7 +275,7 @@ def get_product_metafields(transport: ShopifyTransport, product_gid: str) -> Lis
     node = data.get("node")
     if node is None:
         raise RuntimeError(f"Product not found for GID: {product_gid}")
-    return [e["node"] for e in node["metafields"]["edges"]]
+    return list(map(_node, node["metafields"]["edges"]))
 
 
 _METAFIELDS_SET = """
@@ -307,8 +347,13 @@ def get_product_media(transport: ShopifyTransport, product_gid: str) -> List[str
     product = data.get("product")
     if product is None:
         raise RuntimeError(f"Product not found for GID: {product_gid}")
+    return _image_urls(product["media"]["nodes"])
+
+
+def _image_urls(media_nodes: List[Dict[str, Any]]) -> List[str]:
+    """IMAGE media URLs in order; non-image inline-fragment nodes are empty -> dropped."""
     urls: List[str] = []
-    for node in product["media"]["nodes"]:
+    for node in media_nodes:
         image = (node or {}).get("image") or {}
         url = image.get("url")
         if url:
@@ -363,27 +408,38 @@ query($first: Int!, $after: String) {
 }"""
 
 
-def get_locations(transport: ShopifyTransport) -> List[Dict[str, Any]]:
-    """Return ALL locations as ``{id (GID), name, isActive}``, walking pagination.
+def iter_locations(transport: ShopifyTransport) -> Iterator[Dict[str, Any]]:
+    """Yield every location as ``{id (GID), name, isActive}``, one page at a time.
 
-    Strictly more correct than the legacy single un-paginated REST
-    ``GET /locations.json`` (which silently capped at the default page,
-    sync.py:597). ``node.id`` is a GID string (``gid://shopify/Location/<n>``)
-    which the new inventory mutations consume directly.
+    Generator form of :func:`get_locations`: only the current page is held in
+    memory and the next page is requested lazily, so a consumer that stops early
+    (e.g. :func:`get_location_by_name` on a hit) never pays for the remaining
+    pages.
     """
-    results: List[Dict[str, Any]] = []
     after: Optional[str] = None
     while True:
         data = transport.graphql(
             _GET_LOCATIONS, {"first": CONNECTION_PAGE_SIZE, "after": after}
         )
         conn = data["locations"]
-        results.extend(e["node"] for e in conn["edges"])
+        for edge in conn["edges"]:
+            yield edge["node"]
         page = conn["pageInfo"]
         if not page["hasNextPage"]:
-            break
+            return
         after = page["endCursor"]
-    return results
+
+
+def get_locations(transport: ShopifyTransport) -> List[Dict[str, Any]]:
+    """Return ALL locations as ``{id (GID), name, isActive}``, walking pagination.
+
+    Strictly more correct than the legacy single un-paginated REST
+    ``GET /locations.json`` (which silently capped at the default page,
+    sync.py:597). ``node.id`` is a GID string (``gid://shopify/Location/<n>``)
+    which the new inventory mutations consume directly. List form of
+    :func:`iter_locations`.
+    """
+    return list(iter_locations(transport))
 
 
 def get_location_by_name(transport: ShopifyTransport, name: str) -> Optional[Dict[str, Any]]:
@@ -391,9 +447,10 @@ def get_location_by_name(transport: ShopifyTransport, name: str) -> Optional[Dic
 
     Exact-name match (sync.py:580-611); callers branch on ``None`` -> error/skip.
     Returns a node whose ``id`` is a GID string (not the legacy REST numeric int),
-    so downstream inventory ops receive the GID they require directly.
+    so downstream inventory ops receive the GID they require directly. Streams
+    :func:`iter_locations` and stops paging at the first hit.
     """
-    for node in get_locations(transport):
+    for node in iter_locations(transport):
         if node["name"] == name:
             return node
     return None
@@ -524,6 +581,42 @@ def inventory_set_quantities(
     return payload
 
 
+def inventory_set_quantities_bulk(
+    transport: ShopifyTransport, quantities: List[Tuple[str, str, int]]
+) -> None:
+    """Batched :func:`inventory_set_quantities`: one mutation per
+    ``INVENTORY_SET_BATCH_SIZE`` ``(inventory_item_gid, location_gid, quantity)``
+    entries instead of one round trip each. Same absolute ``on_hand`` set
+    semantics (``ignoreCompareQuantity``, ``reason: "correction"``).
+
+    A 'not stocked' userError in a batch falls back to the single-entry op for
+    that batch's entries (each with its own activate + retry); the sets are
+    absolute, so re-applying entries the batch may already have written is
+    idempotent. fix3: any other non-empty ``userErrors`` RAISE.
+    """
+    for i in range(0, len(quantities), INVENTORY_SET_BATCH_SIZE):
+        chunk = quantities[i:i + INVENTORY_SET_BATCH_SIZE]
+        variables = {
+            "input": {
+                "name": "on_hand",
+                "reason": "correction",
+                "ignoreCompareQuantity": True,
+                "quantities": [
+                    {"inventoryItemId": item, "locationId": loc, "quantity": qty}
+                    for item, loc, qty in chunk
+                ],
+            }
+        }
+        data = transport.graphql(_INVENTORY_SET_QUANTITIES, variables)
+        errors = (data.get("inventorySetQuantities") or {}).get("userErrors") or []
+        if not errors:
+            continue
+        if not _is_not_stocked(errors):
+            raise ShopifyUserError("inventorySetQuantities", errors)
+        for item, loc, qty in chunk:
+            inventory_set_quantities(transport, item, loc, qty)
+
+
 _GET_INVENTORY_LEVEL_ID = """
 query($id: ID!, $loc: ID!) {
   inventoryItem(id: $id) {
@@ -563,13 +656,18 @@ mutation($inventoryLevelId: ID!) {
 
 
 def inventory_deactivate(
-    transport: ShopifyTransport, inventory_item_gid: str, location_gid: str
+    transport: ShopifyTransport,
+    inventory_item_gid: str,
+    location_gid: str,
+    inventory_level_id: Optional[str] = None,
 ) -> None:
     """Remove the inventory level at a location (disconnect), if one exists.
 
-    Resolves the level id first (:func:`get_inventory_level_id`); if ``None``
-    (item not stocked / already disconnected) this is a silent no-op, NOT an
-    error (legacy tolerated 'already disconnected', sync.py:655-663).
+    Resolves the level id first (:func:`get_inventory_level_id`) unless the
+    caller already holds it (``inventory_level_id``, e.g. the ``level_id`` of a
+    :func:`read_variant_inventory` level — saves one lookup per level); if
+    ``None`` (item not stocked / already disconnected) this is a silent no-op,
+    NOT an error (legacy tolerated 'already disconnected', sync.py:655-663).
 
     Requires ``on_hand == 0`` at the location: the Magazzino caller deliberately
     zeroes first (:func:`inventory_set_quantities` qty=0) THEN deactivates,
@@ -578,7 +676,9 @@ def inventory_deactivate(
     fix3: a genuine non-empty ``userErrors`` RAISES (the caller's per-item
     try/except keeps a real error log-and-continue, not fatal to the batch).
     """
-    level_id = get_inventory_level_id(transport, inventory_item_gid, location_gid)
+    level_id = inventory_level_id or get_inventory_level_id(
+        transport, inventory_item_gid, location_gid
+    )
     if level_id is None:
         return None
     data = transport.graphql(_INVENTORY_DEACTIVATE, {"inventoryLevelId": level_id})
@@ -586,6 +686,44 @@ def inventory_deactivate(
     return None
 
 
+def _inventory_deactivate_bulk_document(n: int) -> str:
+    """``n`` aliased ``inventoryDeactivate`` fields (``d0``..``dN-1``, one
+    ``$l<i>`` level id each) in ONE mutation document."""
+    args = ", ".join(f"$l{i}: ID!" for i in range(n))
+    fields = "\n".join(
+        f"  d{i}: inventoryDeactivate(inventoryLevelId: $l{i}) {{ userErrors {{ field message }} }}"
+        for i in range(n)
+    )
+    return f"mutation({args}) {{\n{fields}\n}}"
+
+
+def inventory_deactivate_bulk(
+    transport: ShopifyTransport, inventory_level_ids: List[str]
+) -> None:
+    """Batched :func:`inventory_deactivate` for levels whose ids are already
+    known: one document per ``INVENTORY_DEACTIVATE_BATCH_SIZE`` levels, each an
+    aliased ``inventoryDeactivate`` field (Shopify has no multi-item bulk
+    deactivate; ``inventoryBulkToggleActivation`` covers one item only).
+
+    Same zero-then-deactivate contract as the single op. fix3: non-empty
+    ``userErrors`` on any alias RAISE after the whole batch has run (aliases
+    execute independently, so the others are already applied).
+    """
+    for i in range(0, len(inventory_level_ids), INVENTORY_DEACTIVATE_BATCH_SIZE):
+        chunk = inventory_level_ids[i:i + INVENTORY_DEACTIVATE_BATCH_SIZE]
+        data = transport.graphql(
+            _inventory_deactivate_bulk_document(len(chunk)),
+            {f"l{j}": level_id for j, level_id in enumerate(chunk)},
+        )
+        errors = [
+            err
+            for j in range(len(chunk))
+            for err in (data.get(f"d{j}") or {}).get("userErrors") or []
+        ]
+        if errors:
+            raise ShopifyUserError("inventoryDeactivate", errors)
+
+
 # =============================================================================
 # NET-NEW ops (M3/M5 outlet lifecycle: inventory-read, delete, publish, enumerate)
 # =============================================================================
@@ -631,6 +769,7 @@ query($id: ID!, $variantsFirst: Int!, $levelsFirst: Int!, $variantsAfter: String
             inventoryLevels(first: $levelsFirst) {
               pageInfo { hasNextPage endCursor }
               nodes {
+                id
                 location { id name }
                 quantities(names: ["available", "committed", "on_hand"]) { name quantity }
               }
@@ -662,6 +801,7 @@ def _parse_inventory_levels(inventory_levels: Dict[str, Any]) -> List[Dict[str,
         qmap = {q["name"]: q["quantity"] for q in (lvl.get("quantities") or [])}
         levels.append(
             {
+                "level_id": lvl.get("id"),
                 "location_id": loc.get("id"),
                 "location_name": loc.get("name"),
                 "available": qmap.get("available"),
@@ -686,7 +826,7 @@ def read_variant_inventory(
           "selectedOptions": [{"name","value"}, ...],
           "inventoryItemId": <inventory item GID>,
           "levels": [                               # only locations Shopify returned
-            {"location_id","location_name","available","committed","on_hand"}, ...
+            {"level_id","location_id","location_name","available","committed","on_hand"}, ...
           ],
           "levels_truncated": bool,                 # True => inventory is UNKNOWN
         }
@@ -899,19 +1039,15 @@ query($id: ID!, $first: Int!, $after: String) {
 }"""
 
 
-def enumerate_outlet_products(
+def iter_outlet_products(
     transport: ShopifyTransport, collection_gid: str = OUTLET_COLLECTION_GID
-) -> List[Dict[str, Any]]:
-    """Enumerate ALL members of a collection as ``{id, title, status}``, paginated.
+) -> Iterator[Dict[str, Any]]:
+    """Yield every member of a collection as ``{id, title, status}``, page by page.
 
-    Defaults to the ground-truth OUTLET collection. Walks
-    ``products.pageInfo``/``endCursor`` to page through every member (cap
-    250/page); a smart collection returns members of every status
-    (ACTIVE/DRAFT/ARCHIVED), so ``status`` lets the caller bucket without extra
-    calls. A non-existent collection (null ``collection``) RAISES, matching the
-    null-node handling of the other read ops.
+    Generator form of :func:`enumerate_outlet_products` (same query, same
+    null-collection RAISE — surfaced when the first page is pulled). Only one
+    page of nodes is resident at a time.
     """
-    results: List[Dict[str, Any]] = []
     after: Optional[str] = None
     while True:
         data = transport.graphql(
@@ -922,12 +1058,27 @@ def enumerate_outlet_products(
         if collection is None:
             raise RuntimeError(f"Collection not found for GID: {collection_gid}")
         conn = collection["products"]
-        results.extend(conn["nodes"])
+        yield from conn["nodes"]
         page = conn["pageInfo"]
         if not page["hasNextPage"]:
-            break
+            return
         after = page["endCursor"]
-    return results
+
+
+def enumerate_outlet_products(
+    transport: ShopifyTransport, collection_gid: str = OUTLET_COLLECTION_GID
+) -> List[Dict[str, Any]]:
+    """Enumerate ALL members of a collection as ``{id, title, status}``, paginated.
+
+    Defaults to the ground-truth OUTLET collection. Walks
+    ``products.pageInfo``/``endCursor`` to page through every member (cap
+    250/page); a smart collection returns members of every status
+    (ACTIVE/DRAFT/ARCHIVED), so ``status`` lets the caller bucket without extra
+    calls. A non-existent collection (null ``collection``) RAISES, matching the
+    null-node handling of the other read ops. List form of
+    :func:`iter_outlet_products`.
+    """
+    return list(iter_outlet_products(transport, collection_gid))
 
 
 # -----------------------------------------------------------------------------
@@ -994,26 +1145,138 @@ def get_product_core(transport: ShopifyTransport, product_gid: str) -> Dict[str,
         if product is None:
             raise RuntimeError(f"Product not found for GID: {product_gid}")
         if core is None:
-            core = {
-                "id": product["id"],
-                "title": product.get("title"),
-                "handle": product.get("handle"),
-                "status": product.get("status"),
-                "tags": list(product.get("tags") or []),
-            }
+            core = _core_scalars(product)
         conn = product["collections"]
-        for n in conn["nodes"]:
-            collections.append(
-                {
-                    "id": n["id"],
-                    "title": n.get("title"),
-                    "handle": n.get("handle"),
-                    "smart": n.get("ruleSet") is not None,
-                }
-            )
+        collections.extend(_collection_entry(n) for n in conn["nodes"])
         page = conn["pageInfo"]
         if not page["hasNextPage"]:
             break
         after = page["endCursor"]
     core["collections"] = collections
     return core
+
+
+def _core_scalars(product: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": product["id"],
+        "title": product.get("title"),
+        "handle": product.get("handle"),
+        "status": product.get("status"),
+        "tags": list(product.get("tags") or []),
+    }
+
+
+def _collection_entry(node: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": node["id"],
+        "title": node.get("title"),
+        "handle": node.get("handle"),
+        "smart": node.get("ruleSet") is not None,
+    }
+
+
+# -----------------------------------------------------------------------------
+# 6) Fused product read (core + variants + metafields + media in ONE round trip)
+# -----------------------------------------------------------------------------
+#
+# The delete before_snapshot needs all four per-product reads back to back;
+# one ``product(id:)`` document returns the same nodes for a quarter of the
+# round trips. Page sizes are kept well under the single-query cost ceiling
+# (four 250-node connections with nested objects would not fit); a connection
+# that overflows its page falls back to its dedicated op, so the result is
+# never silently narrower than the separate reads.
+
+BUNDLE_PAGE_SIZE = 100
+
+_GET_PRODUCT_BUNDLE = """
+query($id: ID!, $first: Int!, $withCore: Boolean = true) {
+  product(id: $id) {
+    id
+    title @include(if: $withCore)
+    handle @include(if: $withCore)
+    status @include(if: $withCore)
+    tags @include(if: $withCore)
+    collections(first: $first) @include(if: $withCore) {
+      pageInfo { hasNextPage }
+      nodes { id title handle ruleSet { appliedDisjunctively } }
+    }
+    variants(first: $first) {
+      pageInfo { hasNextPage }
+      nodes {
+        id sku title
+        price
+        compareAtPrice
+        inventoryItem { id }
+        selectedOptions { name value }
+      }
+    }
+    metafields(first: $first) {
+      pageInfo { hasNextPage }
+      nodes { namespace key type value }
+    }
+    media(first: $first) {
+      pageInfo { hasNextPage }
+      nodes {
+        ... on MediaImage { id alt image { url } }
+      }
+    }
+  }
+}"""
+
+
+def get_product_bundle(
+    transport: ShopifyTransport,
+    product_gid: str,
+    *,
+    core: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Read core, variants, metafields and image URLs of one product in one query.
+
+    Returns ``{"core": {...}, "variants": [...], "metafields": [...],
+    "media": [url, ...]}`` with exactly the shapes of :func:`get_product_core`,
+    :func:`get_product_variants`, :func:`get_product_metafields` and
+    :func:`get_product_media`. Any connection
+    with more than :data:`BUNDLE_PAGE_SIZE` nodes is re-read through its
+    dedicated op (one extra call, only for that part). A null ``product`` RAISES,
+    matching the other read ops.
+
+    ``core``: an already-fetched :func:`get_product_core` result for THIS
+    product. The query then skips the core scalars and collections, and the
+    given ``core`` is returned as is.
+    """
+    variables: Dict[str, Any] = {"id": product_gid, "first": BUNDLE_PAGE_SIZE}
+    if core is not None:
+        variables["withCore"] = False
+    data = transport.graphql(_GET_PRODUCT_BUNDLE, variables)
+    product = data.get("product")
+    if product is None:
+        raise RuntimeError(f"Product not found for GID: {product_gid}")
+
+    variants = product["variants"]
+    metafields = product["metafields"]
+    media = product["media"]
+    if core is None:
+        collections = product["collections"]
+        if collections["pageInfo"]["hasNextPage"]:
+            core = get_product_core(transport, product_gid)
+        else:
+            core = _core_scalars(product)
+            core["collections"] = [_collection_entry(n) for n in collections["nodes"]]
+    return {
+        "core": core,
+        "variants": (
+            get_product_variants(transport, product_gid)
+            if variants["pageInfo"]["hasNextPage"]
+            else list(variants["nodes"])
+        ),
+        "metafields": (
+            get_product_metafields(transport, product_gid)
+            if metafields["pageInfo"]["hasNextPage"]
+            else list(metafields["nodes"])
+        ),
+        "media": (
+            get_product_media(transport, product_gid)
+            if media["pageInfo"]["hasNextPage"]
+            else _image_urls(media["nodes"])
+        ),
+    }
@@ -18,6 +18,19 @@ GraphQL-only by design: no generic REST helper (``_get``/``_post``/``_put``/
 ``backend/shopify/ops.py`` per the M1a method-migration map. There is no REST
 code path inside this transport to flag with a TODO.
 
+HTTP client: plain ``requests`` over one keep-alive ``Session`` (HTTP/1.1).
+``httpx``/HTTP/2 was evaluated and deliberately not adopted: ``httpx`` is only
+the web layer's TestClient dependency and ``backend/shopify`` must import on a
+bare interpreter (docs/testing.md); and since every call goes through the
+single-writer throttle, there is never more than one request in flight to
+multiplex. What HTTP/2 would save — the per-call TCP/TLS setup — is already
+saved by reusing the session's connection (one transport per process in the
+web app).
+
+The legacy ``src/`` clients keep their own loops but build on this module's
+public helpers (``__all__``): the keep-alive adapter, body encoding,
+``Retry-After`` / ``THROTTLED`` parsing and the :class:`CostBucket` pacing.
+
 Per-mutation ``userErrors`` are NOT handled here — that's an op-wrapper
 concern (each mutation has its own ``userErrors`` shape). This transport
 raises only on HTTP errors, network errors/timeouts after retries exhausted,
@@ -25,11 +38,18 @@ and top-level GraphQL ``errors``.
 """
 from __future__ import annotations
 
+import functools
+import json
 import logging
+import re
+import socket
+import threading
 import time
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
 
 from backend.config import ShopifyConfig, load_shopify_config
 
@@ -39,18 +59,209 @@ DEFAULT_TIMEOUT_SEC = 30
 DEFAULT_MIN_INTERVAL_SEC = 0.7
 DEFAULT_MAX_RETRIES = 5
 DEFAULT_RETRY_AFTER_SEC = 2.0  # legacy default: sync.py used 1.0, reorder used 2.0 — see report
+# Gateway statuses on which Shopify may send a Retry-After alongside the 5xx.
+RETRY_AFTER_5XX_STATUSES = frozenset({502, 503, 504})
+
+
+# TCP keep-alive probes on the pooled socket: the web app can sit idle for
+# minutes between jobs, and a middlebox that silently drops the idle connection
+# would otherwise cost the next call a failed attempt + backoff. The
+# idle/interval/count knobs are Linux-only; elsewhere plain SO_KEEPALIVE.
+KEEPALIVE_SOCKET_OPTIONS = [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)] + [
+    (socket.IPPROTO_TCP, getattr(socket, name), value)
+    for name, value in (("TCP_KEEPIDLE", 30), ("TCP_KEEPINTVL", 10), ("TCP_KEEPCNT", 3))
+    if hasattr(socket, name)
+]
+
+# A double-quoted GraphQL string literal, or a whitespace run (outside one).
+_STRING_OR_SPACE = re.compile(r'"(?:\\.|[^"\\])*"|\s+')
 
 
 class ShopifyTransportError(RuntimeError):
     """Unrecoverable transport-level error (HTTP, network, or GraphQL top-level errors)."""
 
 
+def retry_after_seconds(headers: Any, default: Optional[float]) -> Optional[float]:
+    """Parse a ``Retry-After`` header as delta-seconds.
+
+    Returns ``default`` when the header is absent, not a number (the HTTP-date
+    form is never sent by Shopify), or negative — a malformed header must not
+    turn a retryable 429 into an unhandled ``ValueError``.
+    """
+    raw = headers.get("Retry-After") if headers else None
+    if raw is None:
+        return default
+    try:
+        value = float(raw)
+    except (TypeError, ValueError):
+        return default
+    return value if value >= 0 else default
+
+
+def _compact_query(query: str) -> str:
+    """Collapse the indentation/newline runs of a query document to single
+    spaces (string literals untouched) — indentation is ~20% of the ``ops``
+    constants' bytes, re-uploaded on every call. Documents with ``#`` comments or
+    block strings are only stripped: a comment runs to end-of-line, so joining
+    lines would swallow the rest of the document."""
+    if "#" in query or '"""' in query:
+        return query.strip()
+    return _STRING_OR_SPACE.sub(
+        lambda m: m.group(0) if m.group(0).startswith('"') else " ", query
+    ).strip()
+
+
+def throttled_wait(data: Dict[str, Any]) -> Optional[float]:
+    """Seconds to wait before retrying a GraphQL-level ``THROTTLED`` response.
+
+    Shopify answers an over-budget query with HTTP 200 and
+    ``errors[].extensions.code == "THROTTLED"`` — not a 429 — plus the bucket
+    state in ``extensions.cost``. Returns ``None`` when the errors are anything
+    but throttling (the caller raises as before), ``0.0`` when the cost block
+    is absent (caller falls back to its backoff), else the time for the bucket
+    to refill the missing points: ``(requested - available) / restoreRate``.
+    """
+    errors = data.get("errors") or []
+    if not errors or not all(
+        ((e or {}).get("extensions") or {}).get("code") == "THROTTLED" for e in errors
+    ):
+        return None
+    cost = (data.get("extensions") or {}).get("cost") or {}
+    status = cost.get("throttleStatus") or {}
+    try:
+        missing = float(cost["requestedQueryCost"]) - float(status["currentlyAvailable"])
+        return max(missing, 0.0) / float(status["restoreRate"])
+    except (KeyError, TypeError, ValueError, ZeroDivisionError):
+        return 0.0
+
+
+@functools.lru_cache(maxsize=128)
+def _encoded_query(query: str) -> bytes:
+    """Compact and JSON-encode a query string once. Queries are module-level
+    constants in ``ops``, so the cache stays small and each text is serialized
+    exactly once per process instead of on every call."""
+    return json.dumps(_compact_query(query)).encode("utf-8")
+
+
+def encode_body(query: str, variables: Dict[str, Any]) -> bytes:
+    """Assemble the ``{"query", "variables"}`` request body as bytes, reusing
+    the cached encoding of the (constant) query text; only ``variables`` is
+    serialized per call."""
+    return (
+        b'{"query":'
+        + _encoded_query(query)
+        + b',"variables":'
+        + json.dumps(variables or {}).encode("utf-8")
+        + b"}"
+    )
+
+
+class KeepAliveAdapter(HTTPAdapter):
+    """``HTTPAdapter`` whose pooled connections enable TCP keep-alive.
+
+    Pool size stays at the ``requests`` default: every call passes the
+    single-writer throttle, so more than one or two sockets to the single
+    Shopify host is never in use. Retries stay in :meth:`ShopifyTransport.graphql`
+    (no urllib3 ``Retry`` here — it would multiply the attempts).
+    """
+
+    def init_poolmanager(self, *args: Any, **kwargs: Any) -> None:
+        kwargs["socket_options"] = HTTPConnection.default_socket_options + KEEPALIVE_SOCKET_OPTIONS
+        super().init_poolmanager(*args, **kwargs)
+
+
+class CostBucket:
+    """Shopify's GraphQL cost bucket as last reported by ``extensions.cost``,
+    plus the requested cost of each query document seen so far.
+
+    One pacing policy for every GraphQL client in the repo
+    (:class:`ShopifyTransport` and the legacy ``src.sync.Shopify``): before
+    re-running a document whose cost is known, wait only until the projected
+    bucket can cover it, then debit it so later calls see the spend. While the
+    cost or the bucket state is unknown, :meth:`wait_for` returns ``None`` and
+    the caller applies its fixed interval. Thread-safe.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        # (currentlyAvailable, restoreRate, monotonic ts of that reading, maximumAvailable)
+        self.state: Optional[Tuple[float, float, float, float]] = None
+        self.query_costs: Dict[str, float] = {}
+
+    def _projected(self, now: float) -> float:
+        """Bucket level at ``now``: last reading plus refill, capped at its size."""
+        available, restore_rate, ts, maximum = self.state
+        return min(available + (now - ts) * restore_rate, maximum)
+
+    def wait_for(self, query: Optional[str], now: float) -> Optional[float]:
+        """Seconds until the projected bucket covers ``query``'s known cost
+        (``0.0`` if it already does); ``None`` while either is unknown."""
+        with self._lock:
+            needed = self.query_costs.get(query) if query is not None else None
+            if needed is None or self.state is None:
+                return None
+            projected = self._projected(now)
+            restore_rate = self.state[1]
+            if projected >= needed or restore_rate <= 0:
+                return 0.0
+            return (needed - projected) / restore_rate
+
+    def debit(self, query: Optional[str], now: float) -> None:
+        """Spend ``query``'s known cost from the bucket (no-op while unknown)."""
+        with self._lock:
+            needed = self.query_costs.get(query) if query is not None else None
+            if needed is None or self.state is None:
+                return
+            _, restore_rate, _, maximum = self.state
+            self.state = (self._projected(now) - needed, restore_rate, now, maximum)
+
+    def credit(self, seconds: float) -> None:
+        """Credit a wait the caller already slept (THROTTLED retry) to the
+        bucket, so the next :meth:`wait_for` does not wait again for the same
+        refill from the reading taken before the sleep."""
+        with self._lock:
+            if self.state is None:
+                return
+            available, restore_rate, _, maximum = self.state
+            now = time.monotonic()
+            refilled = min(available + seconds * restore_rate, maximum)
+            self.state = (max(self._projected(now), refilled), restore_rate, now, maximum)
+
+    def record(self, query: str, data: Dict[str, Any]) -> None:
+        """Remember the bucket state + this document's requested cost from a
+        response's ``extensions.cost`` (absent/malformed -> ignored)."""
+        cost = (data.get("extensions") or {}).get("cost") or {}
+        status = cost.get("throttleStatus") or {}
+        try:
+            requested = float(cost["requestedQueryCost"])
+            available = float(status["currentlyAvailable"])
+            restore_rate = float(status["restoreRate"])
+            maximum = float(status.get("maximumAvailable") or float("inf"))
+        except (KeyError, TypeError, ValueError):
+            return
+        with self._lock:
+            self.query_costs[query] = requested
+            self.state = (available, restore_rate, time.monotonic(), maximum)
+
+
 class ShopifyTransport:
     """Single HTTP session GraphQL transport with throttle + retry.
 
     Store/token/api_version are read from ``backend.config`` (env-only,
     fail-closed) — pass an explicit ``config`` for tests, otherwise one is
     loaded from the environment.
+
+    One instance is shared process-wide by the web app (so every job reuses
+    the session's keep-alive connection); the throttle check is serialized by
+    a lock so concurrent callers cannot both slip under ``min_interval``.
+
+    Calls are paced against Shopify's cost bucket (:class:`CostBucket`): every response's
+    ``extensions.cost`` updates the last known bucket level/restore rate and
+    the requested cost of that query document. Before re-running a document
+    whose cost is known, the throttle waits only until the projected bucket
+    can cover it (and debits it, so concurrent callers see the spend) —
+    instead of the fixed ``min_interval``, which still applies while the cost
+    or the bucket state is unknown.
     """
 
     def __init__(self, config: Optional[ShopifyConfig] = None) -> None:
@@ -60,6 +271,7 @@ class ShopifyTransport:
         )
 
         self.sess = requests.Session()
+        self.sess.mount("https://", KeepAliveAdapter())
         self.sess.headers.update(
             {
                 "X-Shopify-Access-Token": self.config.token,
@@ -71,40 +283,53 @@ class ShopifyTransport:
         self.min_interval = DEFAULT_MIN_INTERVAL_SEC
         self.max_retries = DEFAULT_MAX_RETRIES
         self._last_call_ts = 0.0
+        self._throttle_lock = threading.Lock()
+        self._costs = CostBucket()
 
-    def _throttle(self) -> None:
-        now = time.time()
-        elapsed = now - self._last_call_ts
-        if elapsed < self.min_interval:
-            time.sleep(self.min_interval - elapsed)
+    def _throttle(self, query: Optional[str] = None) -> None:
+        with self._throttle_lock:
+            now = time.monotonic()
+            wait = self._costs.wait_for(query, now)
+            if wait is None:
+                wait = self.min_interval - (now - self._last_call_ts)
+            if wait > 0:
+                time.sleep(wait)
+                now = time.monotonic()
+            self._costs.debit(query, now)
+            self._last_call_ts = now
 
     def graphql(self, query: str, variables: Dict[str, Any]) -> Dict[str, Any]:
         """Run a GraphQL query/mutation with throttle + retry.
 
         Retries (up to ``max_retries`` attempts) on:
           - HTTP 429 — sleeps ``Retry-After`` seconds (default
-            ``DEFAULT_RETRY_AFTER_SEC`` if the header is absent).
-          - HTTP 5xx — exponential backoff capped at 8s.
+            ``DEFAULT_RETRY_AFTER_SEC`` if the header is absent or malformed).
+          - HTTP 5xx — exponential backoff capped at 8s; a 502/503/504 that
+            carries a ``Retry-After`` sleeps that long instead.
           - ``requests.exceptions.Timeout`` / ``RequestException`` — same
             exponential backoff.
+          - GraphQL ``THROTTLED`` errors (HTTP 200) — sleeps until the cost
+            bucket has refilled the query's points (``extensions.cost``), or
+            the exponential backoff when Shopify sent no cost block.
 
         Raises ``ShopifyTransportError`` on:
           - HTTP 4xx other than 429.
-          - top-level GraphQL ``errors``.
-          - retries exhausted (429/5xx/timeout/request-error persisting).
+          - top-level GraphQL ``errors`` (other than ``THROTTLED``).
+          - retries exhausted (429/5xx/throttled/timeout/request-error persisting).
         """
         last_exc: Optional[Exception] = None
+        payload = encode_body(query, variables)
 
         for attempt in range(1, self.max_retries + 1):
-            self._throttle()
+            self._throttle(query)
 
             try:
                 r = self.sess.post(
                     self.graphql_url,
-                    json={"query": query, "variables": variables},
+                    data=payload,
                     timeout=self.timeout,
                 )
-                self._last_call_ts = time.time()
+                self._last_call_ts = time.monotonic()
             except requests.exceptions.Timeout as e:
                 last_exc = e
                 backoff = min(2 ** (attempt - 1), 8)
@@ -127,7 +352,7 @@ class ShopifyTransport:
                 continue
 
             if r.status_code == 429:
-                retry_after = float(r.headers.get("Retry-After", DEFAULT_RETRY_AFTER_SEC))
+                retry_after = retry_after_seconds(r.headers, DEFAULT_RETRY_AFTER_SEC)
                 logger.warning(
                     "429 rate limit (attempt %d/%d). Retry in %.2fs",
                     attempt,
@@ -139,8 +364,10 @@ class ShopifyTransport:
 
             if 500 <= r.status_code < 600:
                 backoff = min(2 ** (attempt - 1), 8)
+                if r.status_code in RETRY_AFTER_5XX_STATUSES:
+                    backoff = retry_after_seconds(r.headers, None) or backoff
                 logger.warning(
-                    "Server error %d (attempt %d/%d). Retry in %ds",
+                    "Server error %d (attempt %d/%d). Retry in %.2fs",
                     r.status_code,
                     attempt,
                     self.max_retries,
@@ -150,13 +377,38 @@ class ShopifyTransport:
                 continue
 
             if r.status_code >= 400:
-                body = r.text[:200] if r.text else "no response body"
-                raise ShopifyTransportError(f"GraphQL HTTP {r.status_code}: {body}")
+                snippet = r.text[:200] if r.text else "no response body"
+                raise ShopifyTransportError(f"GraphQL HTTP {r.status_code}: {snippet}")
 
             data = r.json()
+            self._costs.record(query, data)
             if "errors" in data:
+                wait = throttled_wait(data)
+                if wait is not None:
+                    wait = wait or min(2 ** (attempt - 1), 8)
+                    logger.warning(
+                        "GraphQL THROTTLED (attempt %d/%d). Retry in %.2fs",
+                        attempt,
+                        self.max_retries,
+                        wait,
+                    )
+                    last_exc = ShopifyTransportError("GraphQL THROTTLED")
+                    time.sleep(wait)
+                    self._costs.credit(wait)
+                    continue
                 raise ShopifyTransportError(f"GraphQL errors: {data['errors']}")
             return data["data"]
 
         suffix = f": {last_exc}" if last_exc else ""
         raise ShopifyTransportError(f"GraphQL failed after {self.max_retries} attempts{suffix}")
+
+
+__all__ = [
+    "CostBucket",
+    "KeepAliveAdapter",
+    "ShopifyTransport",
+    "ShopifyTransportError",
+    "encode_body",
+    "retry_after_seconds",
+    "throttled_wait",
+]
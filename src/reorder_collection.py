@@ -20,9 +20,71 @@ from typing import Any, Dict, List, Optional
 
 import requests
 
+from backend.shopify.transport import (
+    KeepAliveAdapter,
+    encode_body,
+    retry_after_seconds,
+    throttled_wait,
+)
+
 logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)s | %(message)s")
 logger = logging.getLogger("reorder")
 
+# Query GraphQL come costanti di modulo: collection e cursore passano come
+# variabili (prima venivano interpolati nel testo della query a ogni pagina).
+_COLLECTION_PRODUCTS = """
+query($id: ID!, $after: String) {
+  collection(id: $id) {
+    products(first: 50, after: $after) {
+      pageInfo {
+        hasNextPage
+        endCursor
+      }
+      edges {
+        node {
+          id
+          title
+          handle
+          variants(first: 1) {
+            edges {
+              node {
+                id
+                price
+                compareAtPrice
+              }
+            }
+          }
+        }
+      }
+    }
+  }
+}
+"""
+
+_COLLECTION_REORDER = """
+mutation collectionReorderProducts($id: ID!, $moves: [MoveInput!]!) {
+  collectionReorderProducts(id: $id, moves: $moves) {
+    job {
+      id
+      done
+    }
+    userErrors {
+      field
+      message
+    }
+  }
+}
+"""
+
+_JOB_STATUS = """
+query($id: ID!) {
+  job(id: $id) {
+    id
+    done
+  }
+}
+"""
+
 class ShopifyCollectionReorder:
     def __init__(self):
         # Supporta SHOPIFY_STORE o usa default hardcoded
@@ -36,6 +98,7 @@ class ShopifyCollectionReorder:
         self.graphql_url = f"{self.base}/graphql.json"
         
         self.sess = requests.Session()
+        self.sess.mount("https://", KeepAliveAdapter())
         self.sess.headers.update({
             "X-Shopify-Access-Token": self.token,
             "Content-Type": "application/json",
@@ -47,35 +110,38 @@ class ShopifyCollectionReorder:
     
     def _throttle(self):
         """Rate limiting"""
-        now = time.time()
+        if self.min_interval <= 0:
+            return
+        now = time.monotonic()
         elapsed = now - self._last_call_ts
         if elapsed < self.min_interval:
             time.sleep(self.min_interval - elapsed)
     
     def graphql(self, query: str, variables: Dict[str, Any]) -> Dict[str, Any]:
         """GraphQL request con retry automatico"""
+        body = encode_body(query, variables)
         for attempt in range(1, self.max_retries + 1):
             self._throttle()
             
             try:
                 r = self.sess.post(
                     self.graphql_url, 
-                    json={"query": query, "variables": variables},
+                    data=body,
                     timeout=30  # Timeout 30s
                 )
-                self._last_call_ts = time.time()
+                self._last_call_ts = time.monotonic()
                 
                 # Gestione 429 - Rate limit exceeded
                 if r.status_code == 429:
-                    retry_after = float(r.headers.get("Retry-After", 2.0))
-                    logger.warning(f"429 Rate limit (tentativo {attempt}/{self.max_retries}). Retry in {retry_after}s")
+                    retry_after = retry_after_seconds(r.headers, 2.0)
+                    logger.warning("429 Rate limit (tentativo %s/%s). Retry in %ss", attempt, self.max_retries, retry_after)
                     time.sleep(retry_after)
                     continue
                 
                 # Gestione 5xx - Server errors
                 if 500 <= r.status_code < 600:
                     backoff = min(2 ** (attempt - 1), 8)
-                    logger.warning(f"Server error {r.status_code} (tentativo {attempt}/{self.max_retries}). Retry in {backoff}s")
+                    logger.warning("Server error %s (tentativo %s/%s). Retry in %ss", r.status_code, attempt, self.max_retries, backoff)
                     time.sleep(backoff)
                     continue
                 
@@ -89,19 +155,26 @@ class ShopifyCollectionReorder:
                 
                 # Gestione errori GraphQL
                 if "errors" in data:
+                    # THROTTLED (HTTP 200): attende la ricarica del bucket e riprova
+                    wait = throttled_wait(data)
+                    if wait is not None:
+                        wait = wait or min(2 ** (attempt - 1), 8)
+                        logger.warning("GraphQL THROTTLED (tentativo %s/%s). Retry in %.2fs", attempt, self.max_retries, wait)
+                        time.sleep(wait)
+                        continue
                     raise RuntimeError(f"GraphQL errors: {data['errors']}")
                 
                 return data["data"]
                 
             except requests.exceptions.Timeout:
                 backoff = min(2 ** (attempt - 1), 8)
-                logger.warning(f"Timeout (tentativo {attempt}/{self.max_retries}). Retry in {backoff}s")
+                logger.warning("Timeout (tentativo %s/%s). Retry in %ss", attempt, self.max_retries, backoff)
                 time.sleep(backoff)
                 continue
             
             except requests.exceptions.RequestException as e:
                 backoff = min(2 ** (attempt - 1), 8)
-                logger.warning(f"Request error (tentativo {attempt}/{self.max_retries}): {e}. Retry in {backoff}s")
+                logger.warning("Request error (tentativo %s/%s): %s. Retry in %ss", attempt, self.max_retries, e, backoff)
                 time.sleep(backoff)
                 continue
         
@@ -121,45 +194,14 @@ class ShopifyCollectionReorder:
         
         while True:
             page += 1
-            after_clause = f', after: "{cursor}"' if cursor else ""
-            
-            query = f"""
-            query {{
-              collection(id: "{collection_gid}") {{
-                products(first: 50{after_clause}) {{
-                  pageInfo {{
-                    hasNextPage
-                    endCursor
-                  }}
-                  edges {{
-                    node {{
-                      id
-                      title
-                      handle
-                      variants(first: 1) {{
-                        edges {{
-                          node {{
-                            id
-                            price
-                            compareAtPrice
-                          }}
-                        }}
-                      }}
-                    }}
-                  }}
-                }}
-              }}
-            }}
-            """
-            
-            data = self.graphql(query, {})
+            data = self.graphql(_COLLECTION_PRODUCTS, {"id": collection_gid, "after": cursor})
             
             collection = data.get("collection")
             if not collection:
                 raise RuntimeError(f"Collection {collection_gid} non trovata")
             
             edges = collection["products"]["edges"]
-            logger.info(f"Pagina {page}: {len(edges)} prodotti")
+            logger.info("Pagina %s: %s prodotti", page, len(edges))
             
             for edge in edges:
                 product = edge["node"]
@@ -167,7 +209,7 @@ class ShopifyCollectionReorder:
                 # Estrai prima variante per prezzi
                 variant_edges = product["variants"]["edges"]
                 if not variant_edges:
-                    logger.warning(f"Prodotto {product['id']} senza varianti, skip")
+                    logger.warning("Prodotto %s senza varianti, skip", product['id'])
                     continue
                 
                 variant = variant_edges[0]["node"]
@@ -186,7 +228,7 @@ class ShopifyCollectionReorder:
                 break
             cursor = page_info["endCursor"]
         
-        logger.info(f"Totale prodotti recuperati: {len(products)}")
+        logger.info("Totale prodotti recuperati: %s", len(products))
         return products
     
     def calculate_discount_percentage(self, product: Dict[str, Any]) -> float:
@@ -226,7 +268,7 @@ class ShopifyCollectionReorder:
         # Log riepilogo
         logger.info("Primi 10 prodotti dopo ordinamento:")
         for i, p in enumerate(sorted_products[:10], 1):
-            logger.info(f"  {i}. {p['title'][:50]:50} - Sconto: {p['discount_pct']:5.1f}%")
+            logger.info("  %s. %-50s - Sconto: %5.1f%%", i, p['title'][:50], p['discount_pct'])
         
         return sorted_products
     
@@ -256,49 +298,34 @@ class ShopifyCollectionReorder:
             batch_num = i // batch_size + 1
             total_batches = (len(moves) + batch_size - 1) // batch_size
             
-            logger.info(f"Riordino batch {batch_num}/{total_batches}: {len(batch)} prodotti")
-            
-            mutation = """
-            mutation collectionReorderProducts($id: ID!, $moves: [MoveInput!]!) {
-              collectionReorderProducts(id: $id, moves: $moves) {
-                job {
-                  id
-                  done
-                }
-                userErrors {
-                  field
-                  message
-                }
-              }
-            }
-            """
+            logger.info("Riordino batch %s/%s: %s prodotti", batch_num, total_batches, len(batch))
             
             variables = {
                 "id": collection_gid,
                 "moves": batch
             }
             
-            data = self.graphql(mutation, variables)
+            data = self.graphql(_COLLECTION_REORDER, variables)
             
             result = data["collectionReorderProducts"]
             
             if result["userErrors"]:
-                logger.error(f"Errori reorder batch {batch_num}: {result['userErrors']}")
+                logger.error("Errori reorder batch %s: %s", batch_num, result['userErrors'])
                 raise RuntimeError(f"Reorder fallito: {result['userErrors']}")
             
             job = result.get("job")
             if job:
                 job_ids.append(job["id"])
-                logger.info(f"Job creato: {job['id']}, done: {job['done']}")
+                logger.info("Job creato: %s, done: %s", job['id'], job['done'])
             
             # Delay tra batch per non saturare API
             if i + batch_size < len(moves):
-                logger.debug(f"Pausa 1s prima del prossimo batch...")
+                logger.debug("Pausa 1s prima del prossimo batch...")
                 time.sleep(1.0)
         
         # Aspetta completamento job (se ci sono job pendenti)
         if job_ids:
-            logger.info(f"Attendo completamento {len(job_ids)} job...")
+            logger.info("Attendo completamento %s job...", len(job_ids))
             self._wait_for_jobs(job_ids)
         
         logger.info("✅ Riordino completato")
@@ -308,42 +335,33 @@ class ShopifyCollectionReorder:
         Aspetta che i job siano completati.
         Polling ogni 2 secondi fino a completamento o timeout.
         """
-        start_time = time.time()
+        start_time = time.monotonic()
         pending_jobs = set(job_ids)
         
-        while pending_jobs and (time.time() - start_time) < max_wait_sec:
+        while pending_jobs and (time.monotonic() - start_time) < max_wait_sec:
             time.sleep(2.0)
             
             for job_id in list(pending_jobs):
                 try:
-                    query = """
-                    query($id: ID!) {
-                      job(id: $id) {
-                        id
-                        done
-                      }
-                    }
-                    """
-                    
-                    data = self.graphql(query, {"id": job_id})
+                    data = self.graphql(_JOB_STATUS, {"id": job_id})
                     job = data.get("job")
                     
                     if job and job["done"]:
-                        logger.info(f"✓ Job completato: {job_id}")
+                        logger.info("✓ Job completato: %s", job_id)
                         pending_jobs.remove(job_id)
                     else:
-                        logger.debug(f"Job {job_id} ancora in esecuzione...")
+                        logger.debug("Job %s ancora in esecuzione...", job_id)
                         
                 except Exception as e:
-                    logger.warning(f"Errore check job {job_id}: {e}")
+                    logger.warning("Errore check job %s: %s", job_id, e)
                     # Rimuovi comunque per evitare loop infinito
                     pending_jobs.remove(job_id)
         
         if pending_jobs:
-            logger.warning(f"⚠️  Timeout: {len(pending_jobs)} job ancora pendenti dopo {max_wait_sec}s")
-            logger.warning(f"Job pendenti: {list(pending_jobs)}")
+            logger.warning("⚠️  Timeout: %s job ancora pendenti dopo %ss", len(pending_jobs), max_wait_sec)
+            logger.warning("Job pendenti: %s", list(pending_jobs))
         else:
-            logger.info(f"✅ Tutti i job completati in {time.time() - start_time:.1f}s")
+            logger.info("✅ Tutti i job completati in %.1fs", time.monotonic() - start_time)
 
 def main():
     parser = argparse.ArgumentParser(description="Riordina collection per sconto %")
@@ -356,9 +374,9 @@ def main():
     
     logger.info("=" * 70)
     logger.info("REORDER COLLECTION BY DISCOUNT %")
-    logger.info(f"Collection ID: {args.collection_id}")
-    logger.info(f"Collection GID: {collection_gid}")
-    logger.info(f"Mode: {'APPLY' if args.apply else 'DRY-RUN'}")
+    logger.info("Collection ID: %s", args.collection_id)
+    logger.info("Collection GID: %s", collection_gid)
+    logger.info("Mode: %s", 'APPLY' if args.apply else 'DRY-RUN')
     logger.info("=" * 70)
     
     # Inizializza client
@@ -377,7 +395,7 @@ def main():
     # 3. Report
     logger.info("=" * 70)
     logger.info("RIEPILOGO ORDINAMENTO:")
-    logger.info(f"Totale prodotti: {len(sorted_products)}")
+    logger.info("Totale prodotti: %s", len(sorted_products))
     
     discount_counts = {}
     for p in sorted_products:
@@ -387,7 +405,7 @@ def main():
     logger.info("Distribuzione sconti:")
     for discount in sorted(discount_counts.keys(), reverse=True):
         count = discount_counts[discount]
-        logger.info(f"  {discount}%: {count} prodotti")
+        logger.info("  %s%%: %s prodotti", discount, count)
     
     # 4. Applica riordino
     if args.apply:
@@ -24,15 +24,34 @@ ENV richieste:
 import argparse
 import json
 import logging
+import operator
 import os
-import re
+import random
 import time
+from collections import OrderedDict
 from typing import Any, Dict, List, Optional, Tuple
 
 import requests
 import gspread
+from gspread.utils import rowcol_to_a1
 from google.oauth2.service_account import Credentials
 
+from backend.gsheet.reader import _clean_price, _norm_key, _truthy_si
+from backend.shopify.ops import (
+    METAFIELDS_SET_MAX,
+    get_inventory_level_id,
+    inventory_activate,
+    inventory_deactivate_bulk,
+    inventory_set_quantities_bulk,
+)
+from backend.shopify.transport import (
+    CostBucket,
+    KeepAliveAdapter,
+    encode_body,
+    retry_after_seconds,
+    throttled_wait,
+)
+
 logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)s | %(name)s | %(message)s")
 logger = logging.getLogger("sync")
 
@@ -40,38 +59,41 @@ logger = logging.getLogger("sync")
 # Utils
 # =============================================================================
 
-def _norm_key(k: str) -> str:
-    """Normalizza chiavi colonne"""
-    return (k or "").strip().lower().replace("-", "_").replace(" ", "_")
-
-def _clean_price(v: Any) -> Optional[str]:
-    """'€ 129', '129,90' -> '129.90'"""
-    if v is None:
-        return None
-    s = str(v).strip()
-    if not s:
-        return None
-    s2 = re.sub(r"[^\d,\.]", "", s)
-    if s2.count(",") == 1 and s2.count(".") == 0:
-        s2 = s2.replace(",", ".")
-    try:
-        return f"{float(s2):.2f}"
-    except Exception:
-        return None
+_node = operator.itemgetter("node")  # edge -> edge["node"]
 
-def _truthy_si(v: Any) -> bool:
-    """Verifica se valore è 'SI' o equivalente"""
-    if v is True:
-        return True
-    if isinstance(v, (int, float)):
-        return int(v) == 1
-    if isinstance(v, str):
-        return v.strip().lower() in {"si", "sì", "true", "1", "x", "ok", "yes"}
-    return False
+# _norm_key / _clean_price / _truthy_si: un'unica copia in backend/gsheet/reader.py
+# (importata sopra, re-esportata qui per fix_prices.py).
 
 def _gid_numeric(gid: str) -> Optional[str]:
     """gid://shopify/Product/123 -> '123'"""
-    return gid.split("/")[-1] if gid else None
+    return gid.rpartition("/")[2] if gid else None
+
+def _unstocked_items(variants: List[Dict[str, Any]], location_gid: str) -> List[str]:
+    """Inventory item GID delle varianti NON stoccate in ``location_gid``.
+    Varianti senza livelli letti o con livelli troncati vengono escluse (stato
+    ignoto: ci pensa il fallback di inventory_set_quantities_bulk)."""
+    items = []
+    for v in variants:
+        levels = v["inventoryItem"].get("inventoryLevels")
+        if not levels or levels["pageInfo"]["hasNextPage"]:
+            continue
+        if all(e["node"]["location"]["id"] != location_gid for e in levels["edges"]):
+            items.append(v["inventoryItem"]["id"])
+    return items
+
+def _location_level_ids(variants: List[Dict[str, Any]], location_gid: str) -> Tuple[List[str], List[str]]:
+    """(InventoryLevel GID delle varianti stoccate in ``location_gid``,
+    inventory item GID con livelli non letti o troncati: da risolvere a parte)."""
+    level_ids, unknown = [], []
+    for v in variants:
+        levels = v["inventoryItem"].get("inventoryLevels")
+        if not levels or levels["pageInfo"]["hasNextPage"]:
+            unknown.append(v["inventoryItem"]["id"])
+            continue
+        level_ids.extend(
+            e["node"]["id"] for e in levels["edges"] if e["node"]["location"]["id"] == location_gid
+        )
+    return level_ids, unknown
 
 # =============================================================================
 # GSheets IO
@@ -115,12 +137,14 @@ def gs_read_rows() -> Tuple[List[Dict[str, Any]], Dict[str, int], Any]:
     header = values[0]
     col_index = {_norm_key(h): i+1 for i, h in enumerate(header)}
     
+    # Chiavi normalizzate una volta per colonna, non una volta per cella
+    keys = [_norm_key(h) for h in header]
+    n_keys = len(keys)
     rows = []
     for row_idx, row in enumerate(values[1:], start=2):
-        m = {}
-        for i, cell in enumerate(row):
-            key = _norm_key(header[i]) if i < len(header) else f"col{i+1}"
-            m[key] = cell
+        m = dict(zip(keys, row))
+        for i in range(n_keys, len(row)):
+            m[f"col{i+1}"] = row[i]
         m["_row_index"] = row_idx  # per write-back
         rows.append(m)
     
@@ -129,19 +153,178 @@ def gs_read_rows() -> Tuple[List[Dict[str, Any]], Dict[str, int], Any]:
 
 def gs_write_product_id(ws, row_index: int, col_index: Dict[str, int], product_gid: str) -> bool:
     """Scrive Product_Id su Google Sheets"""
+    return gs_write_product_ids(ws, col_index, [(row_index, product_gid)])
+
+def gs_write_product_ids(ws, col_index: Dict[str, int], writebacks: List[Tuple[int, str]]) -> bool:
+    """Scrive le coppie (riga, Product_Id) con UNA sola chiamata batch_update
+    (invece di un update_cell per riga). Se fallisce, le coppie non scritte
+    vengono loggate a ERROR (vanno riportate a mano: senza ID il prossimo run
+    ricrea l'outlet)."""
     pid_col = col_index.get("product_id")
     if not pid_col:
         logger.warning("Colonna Product_Id non trovata")
         return False
+    if not writebacks:
+        return True
     
+    rows = [r for r, _ in writebacks]
     try:
-        ws.update_cell(row_index, pid_col, product_gid)
-        logger.info("Write-back Product_Id OK riga %d -> %s", row_index, product_gid)
+        ws.batch_update(
+            [{"range": rowcol_to_a1(r, pid_col), "values": [[gid]]} for r, gid in writebacks],
+            raw=False,  # come update_cell (USER_ENTERED)
+        )
+        logger.info("Write-back Product_Id OK (%d righe): %s", len(rows), rows)
         return True
     except Exception as e:
-        logger.warning("Write-back fallito: %s", e)
+        logger.error("Write-back Product_Id FALLITO, coppie (riga, gid) non scritte %s: %s", list(writebacks), e)
         return False
 
+# =============================================================================
+# Query GraphQL (costanti di modulo, come in backend/shopify/ops.py)
+# =============================================================================
+
+_FIND_SOURCE_BY_SKU = """
+query($q: String!) {
+  products(first: 10, query: $q) {
+    edges { node {
+      id title handle status
+      variants(first: 100) {
+        edges { node {
+          id sku title
+          selectedOptions { name value }
+          inventoryItem { id }
+        }}
+      }
+    }}
+  }
+}"""
+
+_FIND_PRODUCT_BY_HANDLE = """
+query($q: String!) {
+  products(first: 5, query: $q) {
+    edges { node { id title handle status }}
+  }
+}"""
+
+_FIND_OUTLET_BY_SKU = """
+query($q: String!) {
+  products(first: 20, query: $q) {
+    edges { node {
+      id title handle status
+      variants(first: 5) {
+        edges { node { sku }}
+      }
+    }}
+  }
+}"""
+
+_PRODUCT_DUPLICATE = """
+mutation($productId: ID!, $newTitle: String!) {
+  productDuplicate(productId: $productId, newTitle: $newTitle) {
+    newProduct {
+      id title handle status
+      variants(first: 250) {
+        edges { node {
+          id sku title
+          price
+          compareAtPrice
+          inventoryItem {
+            id
+            inventoryLevels(first: 10) {
+              edges { node { id location { id } } }
+              pageInfo { hasNextPage }
+            }
+          }
+          selectedOptions { name value }
+        }}
+      }
+    }
+    userErrors { field message }
+  }
+}"""
+
+_GET_PRODUCT_VARIANTS = """
+query($id: ID!) {
+  node(id: $id) {
+    ... on Product {
+      variants(first: 250) {
+        edges { node {
+          id sku title
+          price
+          compareAtPrice
+          inventoryItem { id }
+          selectedOptions { name value }
+        }}
+      }
+    }
+  }
+}"""
+
+_VARIANTS_BULK_UPDATE = """
+mutation($productId: ID!, $variants: [ProductVariantsBulkInput!]!) {
+  productVariantsBulkUpdate(productId: $productId, variants: $variants) {
+    product { id }
+    productVariants {
+      id sku title
+      price
+      compareAtPrice
+      inventoryItem { id }
+      selectedOptions { name value }
+    }
+    userErrors { field message }
+  }
+}"""
+
+# productSet con SOLO id + files: sostituzione completa delle immagini (le
+# esistenti non elencate vengono rimosse), ordine = ordine dell'array.
+_PRODUCT_SET_FILES = """
+mutation($input: ProductSetInput!) {
+  productSet(input: $input) {
+    product { id }
+    userErrors { field message }
+  }
+}"""
+
+_GET_PRODUCT_METAFIELDS = """
+query($id: ID!) {
+  node(id: $id) {
+    ... on Product {
+      metafields(first: 250) {
+        edges { node { namespace key type value }}
+      }
+    }
+  }
+}"""
+
+_METAFIELDS_SET = """
+mutation($metafields: [MetafieldsSetInput!]!) {
+  metafieldsSet(metafields: $metafields) {
+    metafields { id }
+    userErrors { field message }
+  }
+}"""
+
+# Collection del prodotto: ruleSet null = collection manuale (le smart non si
+# possono lasciare, la membership segue le regole)
+_GET_PRODUCT_COLLECTIONS = """
+query($id: ID!) {
+  node(id: $id) {
+    ... on Product {
+      collections(first: 250) {
+        edges { node { id ruleSet { appliedDisjunctively } }}
+      }
+    }
+  }
+}"""
+
+_PRODUCT_LEAVE_COLLECTIONS = """
+mutation($input: ProductInput!) {
+  productUpdate(input: $input) {
+    product { id }
+    userErrors { field message }
+  }
+}"""
+
 # =============================================================================
 # Shopify Client
 # =============================================================================
@@ -155,7 +338,10 @@ class Shopify:
         self.base = f"https://{self.store}/admin/api/{self.api_version}"
         self.graphql_url = f"{self.base}/graphql.json"
         
+        # Stesso adapter del transport backend: keep-alive TCP sul pool, nessun
+        # Retry urllib3 (i retry restano nel loop di _request/graphql).
         self.sess = requests.Session()
+        self.sess.mount("https://", KeepAliveAdapter())
         self.sess.headers.update({
             "X-Shopify-Access-Token": self.token,
             "Content-Type": "application/json",
@@ -164,25 +350,70 @@ class Shopify:
         self.min_interval = float(os.environ.get("SHOPIFY_MIN_INTERVAL_SEC", "0.7"))
         self.max_retries = int(os.environ.get("SHOPIFY_MAX_RETRIES", "5"))
         self._last_call_ts = 0.0
+        # Leaky bucket REST (header X-Shopify-Shop-Api-Call-Limit "used/total"):
+        # finché non se ne conosce lo stato vale il solo min_interval.
+        self.rest_restore_rate = float(os.environ.get("SHOPIFY_REST_RESTORE_RATE", "2.0"))
+        self._rest_tokens: Optional[float] = None
+        self._rest_ts = 0.0
+        # Bucket GraphQL (extensions.cost): stessa logica del transport backend
+        self._gql_bucket = CostBucket()
         self._location_cache = None
+        # Memo LRU delle query GraphQL di SOLA lettura, per istanza (= per run):
+        # lo stesso prodotto viene riletto più volte nello stesso run.
+        self._read_cache: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+        self._read_cache_size = int(os.environ.get("SHOPIFY_READ_CACHE_SIZE", "1024"))
 
     def _throttle(self):
         """Rate limiting"""
-        now = time.time()
+        if self.min_interval <= 0:
+            return
+        now = time.monotonic()
         elapsed = now - self._last_call_ts
         if elapsed < self.min_interval:
             time.sleep(self.min_interval - elapsed)
 
+    def _rest_throttle(self):
+        """Rate limiting REST: attende solo se il bucket stimato è vuoto."""
+        if self._rest_tokens is None:
+            self._throttle()
+            return
+        available = self._rest_tokens + (time.monotonic() - self._rest_ts) * self.rest_restore_rate
+        if available < 1:
+            time.sleep((1 - available) / self.rest_restore_rate)
+
+    def _record_call_limit(self, r: requests.Response):
+        """Aggiorna il bucket REST dall'header ``used/total`` della risposta."""
+        used, sep, total = (r.headers.get("X-Shopify-Shop-Api-Call-Limit") or "").partition("/")
+        if sep and used.isdigit() and total.isdigit():
+            self._rest_tokens = float(int(total) - int(used))
+            self._rest_ts = self._last_call_ts
+
+    def _gql_throttle(self, query: str):
+        """Rate limiting GraphQL: con bucket e costo della query noti attende solo
+        finché il bucket stimato copre il costo; altrimenti il solo min_interval."""
+        wait = self._gql_bucket.wait_for(query, time.monotonic())
+        if wait is None:
+            self._throttle()
+            return
+        if wait > 0:
+            time.sleep(wait)
+        self._gql_bucket.debit(query, time.monotonic())
+
     def _request(self, method: str, path: str, **kw) -> requests.Response:
         """HTTP request con retry"""
         url = self.base + path
+        if kw.get("json") is not None:
+            # Corpo serializzato una volta sola, non a ogni retry
+            kw["data"] = json.dumps(kw.pop("json")).encode("utf-8")
         for attempt in range(1, self.max_retries + 1):
-            self._throttle()
+            self._rest_throttle()
             r = self.sess.request(method, url, **kw)
-            self._last_call_ts = time.time()
+            self._last_call_ts = time.monotonic()
+            self._record_call_limit(r)
             
             if r.status_code == 429:
-                retry_after = float(r.headers.get("Retry-After", 1.0))
+                # jitter: più worker non ripartono tutti nello stesso istante
+                retry_after = retry_after_seconds(r.headers, 1.0) * (1 + random.random() * 0.3)
                 logger.warning("429 Rate limit. Retry in %.2fs", retry_after)
                 time.sleep(retry_after)
                 continue
@@ -200,19 +431,19 @@ class Shopify:
         r = self._request("GET", path, **kw)
         if r.status_code >= 400:
             raise RuntimeError(f"GET {path} -> {r.status_code}")
-        return r.json() if r.text else {}
+        return r.json() if r.content else {}
 
     def _post(self, path: str, json=None, **kw):
         r = self._request("POST", path, json=json, **kw)
         if r.status_code >= 400:
             raise RuntimeError(f"POST {path} -> {r.status_code}")
-        return r.json() if r.text else {}
+        return r.json() if r.content else {}
 
     def _put(self, path: str, json=None, **kw):
         r = self._request("PUT", path, json=json, **kw)
         if r.status_code >= 400:
             raise RuntimeError(f"PUT {path} -> {r.status_code}")
-        return r.json() if r.text else {}
+        return r.json() if r.content else {}
 
     def _delete(self, path: str, **kw):
         r = self._request("DELETE", path, **kw)
@@ -222,13 +453,14 @@ class Shopify:
 
     def graphql(self, query: str, variables: Dict[str, Any]) -> Dict[str, Any]:
         """GraphQL request"""
+        body = encode_body(query, variables)
         for attempt in range(1, self.max_retries + 1):
-            self._throttle()
-            r = self.sess.post(self.graphql_url, json={"query": query, "variables": variables})
-            self._last_call_ts = time.time()
+            self._gql_throttle(query)
+            r = self.sess.post(self.graphql_url, data=body)
+            self._last_call_ts = time.monotonic()
             
             if r.status_code == 429:
-                retry_after = float(r.headers.get("Retry-After", 1.0))
+                retry_after = retry_after_seconds(r.headers, 1.0)
                 time.sleep(retry_after)
                 continue
             
@@ -241,32 +473,50 @@ class Shopify:
                 raise RuntimeError(f"GraphQL HTTP {r.status_code}")
             
             data = r.json()
+            self._gql_bucket.record(query, data)
             if "errors" in data:
+                # THROTTLED (HTTP 200): attende la ricarica del bucket e riprova
+                wait = throttled_wait(data)
+                if wait is not None:
+                    wait = wait or min(2 ** (attempt - 1), 8)
+                    logger.warning("GraphQL THROTTLED. Retry in %.2fs", wait)
+                    time.sleep(wait)
+                    self._gql_bucket.credit(wait)
+                    continue
                 raise RuntimeError(f"GraphQL errors: {data['errors']}")
             return data["data"]
         
         raise RuntimeError("GraphQL failed after retries")
 
+    def _graphql_cached(self, query: str, variables: Dict[str, Any]) -> Dict[str, Any]:
+        """GraphQL di sola lettura con memo LRU (chiave: query + variabili).
+        Le mutation invalidano via ``_invalidate_cached(gid)``."""
+        key = (query, json.dumps(variables, sort_keys=True))
+        if key in self._read_cache:
+            self._read_cache.move_to_end(key)
+            return self._read_cache[key]
+        data = self.graphql(query, variables)
+        self._seed_cached(query, variables, data)
+        return data
+
+    def _seed_cached(self, query: str, variables: Dict[str, Any], data: Dict[str, Any]):
+        """Memorizza ``data`` come risultato di una lettura (es. lo stato già
+        restituito da una mutation, così la lettura successiva non va in rete)."""
+        self._read_cache[(query, json.dumps(variables, sort_keys=True))] = data
+        if len(self._read_cache) > self._read_cache_size:
+            self._read_cache.popitem(last=False)
+
+    def _invalidate_cached(self, gid: str):
+        """Scarta ogni lettura memorizzata che riguarda ``gid``."""
+        for key in [k for k in self._read_cache if gid in k[1]]:
+            del self._read_cache[key]
+
     # --- Metodi specifici ---
 
     def find_product_by_sku_non_outlet(self, sku: str) -> Optional[Dict[str, Any]]:
         """Trova prodotto sorgente (non-outlet) by SKU"""
         q = f"sku:{sku}"
-        data = self.graphql("""
-        query($q: String!) {
-          products(first: 10, query: $q) {
-            edges { node { 
-              id title handle status
-              variants(first: 100) { 
-                edges { node { 
-                  id sku title 
-                  selectedOptions { name value } 
-                  inventoryItem { id } 
-                }}
-              }
-            }}
-          }
-        }""", {"q": q})
+        data = self.graphql(_FIND_SOURCE_BY_SKU, {"q": q})
         
         for edge in data["products"]["edges"]:
             p = edge["node"]
@@ -282,12 +532,7 @@ class Shopify:
     def find_product_by_handle(self, handle: str) -> Optional[Dict[str, Any]]:
         """Trova prodotto by handle esatto"""
         q = f"handle:{handle}"
-        data = self.graphql("""
-        query($q: String!) {
-          products(first: 5, query: $q) { 
-            edges { node { id title handle status }}
-          }
-        }""", {"q": q})
+        data = self.graphql(_FIND_PRODUCT_BY_HANDLE, {"q": q})
         
         for edge in data["products"]["edges"]:
             if edge["node"]["handle"] == handle:
@@ -301,19 +546,9 @@ class Shopify:
         Esclude il prodotto sorgente (senza -outlet).
         """
         q = f"sku:{sku}"
-        logger.info("🔍 Query GraphQL: '%s'", q)
+        logger.debug("🔍 Query GraphQL: '%s'", q)
         
-        data = self.graphql("""
-        query($q: String!) {
-          products(first: 20, query: $q) {
-            edges { node { 
-              id title handle status
-              variants(first: 5) {
-                edges { node { sku }}
-              }
-            }}
-          }
-        }""", {"q": q})
+        data = self.graphql(_FIND_OUTLET_BY_SKU, {"q": q})
         
         num_results = len(data["products"]["edges"])
         logger.info("📊 Ricerca outlet per SKU=%s: trovati %d prodotti totali", sku, num_results)
@@ -323,61 +558,39 @@ class Shopify:
             logger.warning("⚠️ Verifica che il prodotto outlet esistente su Shopify abbia effettivamente SKU=%s", sku)
             return None
         
+        # Dettaglio per candidato solo a livello DEBUG (niente formattazione
+        # delle liste SKU quando non viene loggato)
+        debug = logger.isEnabledFor(logging.DEBUG)
+        
         # Cerca prodotto outlet (handle contiene "outlet") con questo SKU
         for i, edge in enumerate(data["products"]["edges"], 1):
             p = edge["node"]
-            handle_lower = p["handle"].lower()
             
-            # Log TUTTI i prodotti trovati
-            logger.info("  [%d/%d] Prodotto trovato:", i, num_results)
-            logger.info("      - ID: %s", p["id"])
-            logger.info("      - Titolo: %s", p["title"])
-            logger.info("      - Handle: %s", p["handle"])
-            logger.info("      - Status: %s", p["status"])
-            
-            # Mostra SKU varianti
-            variant_skus = [v["node"]["sku"] for v in p["variants"]["edges"]]
-            logger.info("      - SKU varianti: %s", variant_skus)
+            if debug:
+                logger.debug("  [%d/%d] Prodotto trovato: ID=%s Titolo='%s' Handle='%s' Status=%s SKU varianti=%s",
+                             i, num_results, p["id"], p["title"], p["handle"], p["status"],
+                             [v["node"]["sku"] for v in p["variants"]["edges"]])
             
             # FILTRO OUTLET: Handle O Titolo devono indicare che è un outlet
             # Alcuni outlet hanno titolo "... - Outlet" ma handle senza "outlet"!
-            handle_has_outlet = "outlet" in handle_lower
-            title_lower = p["title"].lower()
-            title_has_outlet = "outlet" in title_lower or p["title"].endswith(" - Outlet")
-            
-            is_outlet = handle_has_outlet or title_has_outlet
+            handle_has_outlet = "outlet" in p["handle"].lower()
+            title_has_outlet = "outlet" in p["title"].lower() or p["title"].endswith(" - Outlet")
             
-            if not is_outlet:
-                logger.info("      ❌ Scartato: né handle né titolo indicano 'outlet'")
-                logger.info("         (handle='%s', titolo='%s')", p["handle"], p["title"])
+            if not (handle_has_outlet or title_has_outlet):
+                if debug:
+                    logger.debug("      ❌ Scartato: né handle né titolo indicano 'outlet'")
                 continue
-            else:
-                if handle_has_outlet:
-                    logger.info("      ✓ Handle contiene 'outlet'")
-                if title_has_outlet:
-                    logger.info("      ✓ Titolo indica 'outlet' (termina con '- Outlet' o contiene 'outlet')")
             
             # Verifica che abbia effettivamente una variante con questo SKU
-            has_sku = False
-            for vedge in p["variants"]["edges"]:
-                variant_sku = (vedge["node"]["sku"] or "").strip()
-                if variant_sku == sku:
-                    has_sku = True
-                    logger.info("      ✓ Trovata variante con SKU match: '%s' == '%s'", variant_sku, sku)
-                    break
-                else:
-                    logger.debug("      - Variante SKU '%s' != '%s'", variant_sku, sku)
-            
+            has_sku = any((vedge["node"]["sku"] or "").strip() == sku for vedge in p["variants"]["edges"])
             if not has_sku:
-                logger.info("      ❌ Scartato: nessuna variante con SKU esatto '%s'", sku)
+                if debug:
+                    logger.debug("      ❌ Scartato: nessuna variante con SKU esatto '%s'", sku)
                 continue
             
             # Trovato outlet!
-            logger.info("🎯 MATCH! Trovato outlet esistente:")
-            logger.info("   - SKU: %s", sku)
-            logger.info("   - Handle: %s", p["handle"])
-            logger.info("   - Status: %s", p["status"])
-            logger.info("   - ID: %s", p["id"])
+            logger.info("🎯 MATCH! Outlet esistente per SKU=%s: %s (handle: %s, status: %s)",
+                        sku, p["id"], p["handle"], p["status"])
             return p
         
         logger.warning("❌ Nessun outlet trovato per SKU=%s dopo verifica %d prodotti", sku, num_results)
@@ -385,24 +598,24 @@ class Shopify:
 
     def product_duplicate(self, source_gid: str, new_title: str) -> str:
         """Duplica prodotto (solo con newTitle, handle viene aggiornato dopo)"""
-        data = self.graphql("""
-        mutation($productId: ID!, $newTitle: String!) {
-          productDuplicate(productId: $productId, newTitle: $newTitle) {
-            newProduct { id title handle status }
-            userErrors { field message }
-          }
-        }""", {"productId": source_gid, "newTitle": new_title})
+        data = self.graphql(_PRODUCT_DUPLICATE, {"productId": source_gid, "newTitle": new_title})
         
         dup = data["productDuplicate"]
         if dup["userErrors"]:
             raise RuntimeError(f"productDuplicate errors: {dup['userErrors']}")
         
-        return dup["newProduct"]["id"]
+        # Le varianti del duplicato arrivano con la stessa risposta: diventano
+        # la lettura memorizzata di get_product_variants
+        new = dup["newProduct"]
+        if "variants" in new:
+            self._seed_cached(_GET_PRODUCT_VARIANTS, {"id": new["id"]}, {"node": {"variants": new["variants"]}})
+        return new["id"]
 
     def delete_product(self, product_gid: str):
         """Elimina prodotto"""
         num_id = _gid_numeric(product_gid)
         self._delete(f"/products/{num_id}.json")
+        self._invalidate_cached(product_gid)
         logger.info("Eliminato prodotto %s", product_gid)
 
     def update_product_basic(self, product_gid: str, handle: str, status: str, tags: str):
@@ -417,32 +630,26 @@ class Shopify:
             }
         }
         self._put(f"/products/{num_id}.json", json=payload)
+        self._invalidate_cached(product_gid)
 
     def get_product_variants(self, product_gid: str) -> List[Dict[str, Any]]:
-        """Ottiene varianti prodotto"""
-        data = self.graphql("""
-        query($id: ID!) {
-          node(id: $id) {
-            ... on Product {
-              variants(first: 250) {
-                edges { node {
-                  id sku title
-                  price
-                  compareAtPrice
-                  inventoryItem { id }
-                  selectedOptions { name value }
-                }}
-              }
-            }
-          }
-        }""", {"id": product_gid})
+        """Ottiene varianti prodotto (memo per run, invalidato dalle mutation)"""
+        data = self._graphql_cached(_GET_PRODUCT_VARIANTS, {"id": product_gid})
 
         edges = data["node"]["variants"]["edges"]
-        return [e["node"] for e in edges]
-
-    def variants_bulk_update_prices(self, product_gid: str, price: str, compare_at: Optional[str]):
-        """Aggiorna prezzi su TUTTE le varianti"""
-        variants = self.get_product_variants(product_gid)
+        return list(map(_node, edges))
+
+    def variants_bulk_update_prices(
+        self,
+        product_gid: str,
+        price: str,
+        compare_at: Optional[str],
+        variants: Optional[List[Dict[str, Any]]] = None,
+    ):
+        """Aggiorna prezzi su TUTTE le varianti (``variants`` se già lette,
+        altrimenti le legge)"""
+        if variants is None:
+            variants = self.get_product_variants(product_gid)
         updates = []
         for v in variants:
             updates.append({
@@ -454,20 +661,27 @@ class Shopify:
         if not updates:
             return
         
-        data = self.graphql("""
-        mutation($productId: ID!, $variants: [ProductVariantsBulkInput!]!) {
-          productVariantsBulkUpdate(productId: $productId, variants: $variants) {
-            product { id }
-            userErrors { field message }
-          }
-        }""", {"productId": product_gid, "variants": updates})
+        data = self.graphql(_VARIANTS_BULK_UPDATE, {"productId": product_gid, "variants": updates})
+        self._invalidate_cached(product_gid)
         
-        errs = data["productVariantsBulkUpdate"]["userErrors"]
+        res = data["productVariantsBulkUpdate"]
+        errs = res["userErrors"]
         if errs:
             logger.warning("Errori update prezzi: %s", errs)
+            return
+        
+        # La mutation restituisce già TUTTE le varianti aggiornate: diventano la
+        # lettura memorizzata, gli step inventario non rileggono il prodotto
+        returned = res.get("productVariants") or []
+        if len(returned) == len(updates):
+            self._seed_cached(
+                _GET_PRODUCT_VARIANTS,
+                {"id": product_gid},
+                {"node": {"variants": {"edges": [{"node": v} for v in returned]}}},
+            )
 
     def copy_images(self, source_gid: str, dest_gid: str):
-        """Copia immagini mantenendo ordine (con batch GraphQL opzionale)"""
+        """Copia immagini mantenendo ordine (productSet, fallback REST)"""
         source_num = _gid_numeric(source_gid)
         dest_num = _gid_numeric(dest_gid)
 
@@ -475,7 +689,22 @@ class Shopify:
         src_imgs = self._get(f"/products/{source_num}/images.json").get("images", [])
         src_imgs.sort(key=lambda x: x.get("position", 999))
 
-        # Delete existing dest images
+        # Sostituzione completa in UNA mutation (niente delete per immagine,
+        # niente sleep tra upload) se abilitata
+        enable_batch = os.getenv("ENABLE_BATCH_IMAGE_UPLOAD", "true").lower() in ("true", "1", "yes")
+        if enable_batch:
+            files = [{"originalSource": img["src"], "alt": "", "contentType": "IMAGE"} for img in src_imgs]
+            try:
+                data = self.graphql(_PRODUCT_SET_FILES, {"input": {"id": dest_gid, "files": files}})
+                errs = data["productSet"]["userErrors"]
+                if not errs:
+                    logger.info("Immagini copiate via productSet: %d totali", len(src_imgs))
+                    return
+                logger.warning("productSet immagini errors, fallback a REST: %s", errs)
+            except Exception as e:
+                logger.warning("productSet immagini fallito, fallback a REST: %s", e)
+
+        # Fallback: REST delete + upload sequenziale (comportamento originale)
         dest_imgs = self._get(f"/products/{dest_num}/images.json").get("images", [])
         for img in dest_imgs:
             try:
@@ -483,47 +712,6 @@ class Shopify:
             except Exception as e:
                 logger.warning("Delete image failed: %s", e)
 
-        # OTTIMIZZAZIONE: Batch GraphQL upload se abilitato
-        enable_batch = os.getenv("ENABLE_BATCH_IMAGE_UPLOAD", "true").lower() in ("true", "1", "yes")
-        batch_size = int(os.getenv("BATCH_SIZE_IMAGES", "10"))
-
-        if enable_batch and len(src_imgs) >= 3:
-            # Usa productCreateMedia GraphQL per batch upload
-            try:
-                media_inputs = []
-                for img in src_imgs:
-                    media_inputs.append({
-                        "originalSource": img["src"],
-                        "alt": "",
-                        "mediaContentType": "IMAGE"
-                    })
-
-                # Process in chunks
-                for i in range(0, len(media_inputs), batch_size):
-                    chunk = media_inputs[i:i+batch_size]
-
-                    data = self.graphql("""
-                    mutation($productId: ID!, $media: [CreateMediaInput!]!) {
-                      productCreateMedia(productId: $productId, media: $media) {
-                        media { ... on MediaImage { id } }
-                        userErrors { field message }
-                      }
-                    }""", {"productId": dest_gid, "media": chunk})
-
-                    errs = data["productCreateMedia"]["userErrors"]
-                    if errs:
-                        logger.warning("Batch image upload errors: %s", errs)
-
-                    logger.debug("Uploaded %d images via batch GraphQL", len(chunk))
-                    time.sleep(0.5)  # Delay tra batch
-
-                logger.info("Immagini copiate via batch GraphQL: %d totali", len(src_imgs))
-                return
-
-            except Exception as e:
-                logger.warning("Batch image upload fallito, fallback a REST: %s", e)
-
-        # Fallback: REST upload sequenziale (comportamento originale)
         for i, img in enumerate(src_imgs, 1):
             try:
                 self._post(f"/products/{dest_num}/images.json", json={
@@ -532,63 +720,66 @@ class Shopify:
                         "position": i,
                         "alt": ""  # Alt vuoto
                     }
-                })
-                time.sleep(0.15)  # Rate limit images
+                })  # pacing: bucket REST in _request, niente sleep fisso
             except Exception as e:
                 logger.warning("Add image failed: %s", e)
 
     def copy_metafields(self, source_gid: str, dest_gid: str):
         """Copia metafields"""
-        data = self.graphql("""
-        query($id: ID!) {
-          node(id: $id) {
-            ... on Product {
-              metafields(first: 250) {
-                edges { node { namespace key type value }}
-              }
-            }
-          }
-        }""", {"id": source_gid})
+        data = self._graphql_cached(_GET_PRODUCT_METAFIELDS, {"id": source_gid})
         
-        mfs = [e["node"] for e in data["node"]["metafields"]["edges"]]
+        mfs = list(map(_node, data["node"]["metafields"]["edges"]))
         if not mfs:
             return
         
         updates = [{"ownerId": dest_gid, **m} for m in mfs]
         
-        # Batch update
-        for i in range(0, len(updates), 20):
-            chunk = updates[i:i+20]
-            data = self.graphql("""
-            mutation($metafields: [MetafieldsSetInput!]!) {
-              metafieldsSet(metafields: $metafields) {
-                metafields { id }
-                userErrors { field message }
-              }
-            }""", {"metafields": chunk})
+        # Batch update (chunk al massimo consentito da metafieldsSet)
+        for i in range(0, len(updates), METAFIELDS_SET_MAX):
+            chunk = updates[i:i + METAFIELDS_SET_MAX]
+            data = self.graphql(_METAFIELDS_SET, {"metafields": chunk})
+        self._invalidate_cached(dest_gid)
 
     def delete_collects(self, product_gid: str):
-        """Elimina collections manuali"""
-        num_id = _gid_numeric(product_gid)
-        collects = self._get("/collects.json", params={"product_id": num_id}).get("collects", [])
-        for c in collects:
-            try:
-                self._delete(f"/collects/{c['id']}.json")
-            except Exception:
-                pass
+        """Elimina collections manuali (una query + UNA productUpdate con
+        collectionsToLeave, invece di GET collects + un DELETE REST per collect)"""
+        data = self.graphql(_GET_PRODUCT_COLLECTIONS, {"id": product_gid})
+        manual = [
+            c["id"] for c in map(_node, data["node"]["collections"]["edges"])
+            if c.get("ruleSet") is None
+        ]
+        if not manual:
+            return
+        
+        data = self.graphql(
+            _PRODUCT_LEAVE_COLLECTIONS,
+            {"input": {"id": product_gid, "collectionsToLeave": manual}},
+        )
+        self._invalidate_cached(product_gid)
+        
+        errs = data["productUpdate"]["userErrors"]
+        if errs:
+            logger.warning("Errori rimozione collections: %s", errs)
 
     def get_location_by_name(self, name: str) -> Optional[Dict[str, Any]]:
         """Trova location by name (con cache persistente opzionale)"""
         enable_cache = os.getenv("ENABLE_LOCATION_CACHE", "true").lower() in ("true", "1", "yes")
         cache_file = os.getenv("LOCATION_CACHE_FILE", "/tmp/shopify_locations_cache.json")
+        # Le location cambiano di rado, ma non mai: il file scade dopo il TTL.
+        cache_ttl = float(os.getenv("LOCATION_CACHE_TTL_SEC", "86400"))
 
-        # Carica cache da file se abilitato
+        # Carica cache da file se abilitato (e non scaduto)
+        from_file = False
         if enable_cache and self._location_cache is None and os.path.exists(cache_file):
             try:
-                with open(cache_file, "r") as f:
-                    cache_data = json.load(f)
-                    self._location_cache = {loc["name"]: loc for loc in cache_data}
-                    logger.debug("Location cache loaded from %s", cache_file)
+                if time.time() - os.path.getmtime(cache_file) < cache_ttl:
+                    with open(cache_file, "r") as f:
+                        cache_data = json.load(f)
+                        self._location_cache = {loc["name"]: loc for loc in cache_data}
+                        from_file = True
+                        logger.debug("Location cache loaded from %s", cache_file)
+                else:
+                    logger.debug("Location cache %s scaduta, ricarico", cache_file)
             except Exception as e:
                 logger.warning("Impossibile caricare location cache: %s", e)
 
@@ -600,67 +791,31 @@ class Shopify:
             # Salva cache su file se abilitato
             if enable_cache:
                 try:
-                    import os as os_module
-                    os_module.makedirs(os_module.path.dirname(cache_file), exist_ok=True)
+                    os.makedirs(os.path.dirname(cache_file), exist_ok=True)
                     with open(cache_file, "w") as f:
                         json.dump(locs, f)
                     logger.debug("Location cache saved to %s", cache_file)
                 except Exception as e:
                     logger.warning("Impossibile salvare location cache: %s", e)
 
-        return self._location_cache.get(name)
+        loc = self._location_cache.get(name)
+        if loc is None and from_file:
+            # Location assente da un file di un run precedente: rileggi da API una volta
+            self.refresh_locations()
+            return self.get_location_by_name(name)
+        return loc
 
-    def inventory_connect(self, inv_item_id: int, location_id: int):
-        """Connette inventory item a location"""
-        try:
-            self._post("/inventory_levels/connect.json", json={
-                "inventory_item_id": inv_item_id,
-                "location_id": location_id
-            })
-        except Exception as e:
-            # FIX BUG #6: Log solo se non è già connesso
-            if "already exists" not in str(e).lower():
-                logger.warning("inventory_connect failed item=%s loc=%s: %s", inv_item_id, location_id, e)
-
-    def inventory_set(self, inv_item_id: int, location_id: int, qty: int):
-        """Imposta quantità (con retry automatico se item non connesso)"""
-        try:
-            self._post("/inventory_levels/set.json", json={
-                "inventory_item_id": inv_item_id,
-                "location_id": location_id,
-                "available": qty
-            })
-        except RuntimeError as e:
-            # Se 422 = item non connesso, prova a connettere e riprova
-            if "422" in str(e):
-                logger.warning("Item %s non connesso a location %s (422), connetto e riprovo", 
-                             inv_item_id, location_id)
-                try:
-                    self.inventory_connect(inv_item_id, location_id)
-                    # Delay più lungo per propagazione Shopify (è lento!)
-                    time.sleep(1.5)
-                    # Riprova
-                    self._post("/inventory_levels/set.json", json={
-                        "inventory_item_id": inv_item_id,
-                        "location_id": location_id,
-                        "available": qty
-                    })
-                    logger.info("✓ Retry riuscito dopo connect")
-                except Exception as retry_e:
-                    logger.error("✗ Retry fallito: %s", retry_e)
-                    raise
-            else:
-                raise
-
-    def inventory_delete_level(self, inv_item_id: int, location_id: int):
-        """Rimuove inventory level"""
+    def refresh_locations(self):
+        """Scarta la cache location (memoria + file): il prossimo
+        ``get_location_by_name`` rilegge da API."""
+        self._location_cache = None
+        cache_file = os.getenv("LOCATION_CACHE_FILE", "/tmp/shopify_locations_cache.json")
         try:
-            self._delete("/inventory_levels.json", params={
-                "inventory_item_id": inv_item_id,
-                "location_id": location_id
-            })
-        except Exception as e:
-            logger.warning("inventory_delete_level failed item=%s loc=%s: %s", inv_item_id, location_id, e)
+            os.remove(cache_file)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning("Impossibile rimuovere location cache: %s", e)
 
     # ========== NUOVI METODI per variant_reset.py e channel_manager.py ==========
 
@@ -669,10 +824,19 @@ class Shopify:
 # Workflow principale
 # =============================================================================
 
-def process_sku_group(shop: Shopify, sku: str, rows: List[Dict[str, Any]], ws, col_index: Dict[str, int]) -> str:
+def process_sku_group(
+    shop: Shopify,
+    sku: str,
+    rows: List[Dict[str, Any]],
+    ws,
+    col_index: Dict[str, int],
+    writebacks: Optional[List[Tuple[int, str]]] = None,
+) -> str:
     """
     Processa gruppo di righe con stesso SKU (più taglie).
     Crea UN SOLO outlet con inventory distribuito su tutte le taglie.
+    Con ``writebacks`` il Product_Id non viene scritto subito ma accodato
+    (riga, gid) per il flush del chiamante.
     """
     logger.info("=" * 60)
     logger.info("Processing SKU=%s con %d taglie", sku, len(rows))
@@ -733,6 +897,9 @@ def process_sku_group(shop: Shopify, sku: str, rows: List[Dict[str, Any]], ws, c
     # 4. Duplica prodotto
     logger.info("Duplicazione: %s -> %s", source_title, outlet_title)
     outlet_gid = shop.product_duplicate(source_gid, outlet_title)
+    # Varianti dalla risposta del duplicate (nessuna query): gli step 5-8 non
+    # toccano id/SKU/opzioni/inventoryItem, restano valide per i prezzi
+    dup_variants = shop.get_product_variants(outlet_gid)
     
     # 5. Aggiorna handle, status, tags
     final_handle = outlet_handle
@@ -774,10 +941,12 @@ def process_sku_group(shop: Shopify, sku: str, rows: List[Dict[str, Any]], ws, c
         logger.warning("Errore pulizia collections: %s", e)
     
     # 9. Aggiorna prezzi su TUTTE le varianti (usa prezzi dalla prima riga)
-    shop.variants_bulk_update_prices(outlet_gid, prezzo_scontato, prezzo_pieno)
+    shop.variants_bulk_update_prices(outlet_gid, prezzo_scontato, prezzo_pieno, dup_variants)
     logger.info("Prezzi aggiornati: scontato=%s pieno=%s", prezzo_scontato, prezzo_pieno)
     
-    # 10. Gestione inventario
+    # 10. Gestione inventario (varianti lette UNA volta per Promo e Magazzino:
+    # sono quelle restituite dall'update prezzi)
+    variants = shop.get_product_variants(outlet_gid)
     # WORKAROUND: Supporta sia NAME che ID diretto (per evitare 403 su /locations.json)
     promo_name = os.environ.get("PROMO_LOCATION_NAME")
     promo_id = os.environ.get("PROMO_LOCATION_ID")
@@ -795,22 +964,18 @@ def process_sku_group(shop: Shopify, sku: str, rows: List[Dict[str, Any]], ws, c
         promo = shop.get_location_by_name(promo_name)
 
     if promo:
-            variants = shop.get_product_variants(outlet_gid)
-            
-            # Reset tutte le varianti a 0 in Promo
-            # Fai connect+set in modo atomico per ogni variante con delay
-            logger.info("Connetto e azzero %d varianti a Promo...", len(variants))
-            for v in variants:
-                inv_id = int(_gid_numeric(v["inventoryItem"]["id"]))
-                try:
-                    shop.inventory_connect(inv_id, promo["id"])
-                    # Delay più lungo per propagazione (Shopify è lento!)
-                    time.sleep(0.8)
-                    shop.inventory_set(inv_id, promo["id"], 0)
-                except Exception as e:
-                    logger.warning("Errore reset variante %s: %s", inv_id, e)
-            
-            # Imposta inventory per ogni taglia specifica dal Google Sheet
+            # Indice taglia -> variante (prima variante con questo SKU vince, come
+            # nella vecchia scansione lineare) costruito UNA volta per il gruppo
+            sku_variants = [v for v in variants if (v.get("sku") or "").strip() == sku]
+            by_taglia: Dict[str, Dict[str, Any]] = {}
+            for v in sku_variants:
+                for opt in v.get("selectedOptions", []):
+                    if opt["name"].lower() in ["size", "taglia"]:
+                        by_taglia.setdefault(opt["value"].strip(), v)
+
+            # Quantità finale per variante: tutte a 0 in Promo, poi la taglia dal
+            # Google Sheet (l'ultima riga vince, come i set in sequenza di prima)
+            target_qty = {v["inventoryItem"]["id"]: 0 for v in variants}
             logger.info("Gestisco %d taglie per outlet:", len(rows))
             for row in rows:
                 taglia = (row.get("taglia") or "").strip()
@@ -820,34 +985,39 @@ def process_sku_group(shop: Shopify, sku: str, rows: List[Dict[str, Any]], ws, c
                 except:
                     qta = 0
                 
-                # Trova variante per questa taglia
-                target_variant = None
-                found = False
-                
-                for v in variants:
-                    if (v.get("sku") or "").strip() != sku:
-                        continue
-                    
-                    # Match per taglia se specificata
-                    if taglia:
-                        for opt in v.get("selectedOptions", []):
-                            if opt["name"].lower() in ["size", "taglia"]:
-                                if opt["value"].strip() == taglia:
-                                    target_variant = v
-                                    found = True
-                                    break
-                        if found:  # Esci anche dal loop esterno
-                            break
-                    else:
-                        target_variant = v
-                        break
+                # Trova variante per questa taglia (senza taglia: prima con lo SKU)
+                if taglia:
+                    target_variant = by_taglia.get(taglia)
+                else:
+                    target_variant = sku_variants[0] if sku_variants else None
                 
                 if target_variant:
-                    inv_id = int(_gid_numeric(target_variant["inventoryItem"]["id"]))
-                    shop.inventory_set(inv_id, promo["id"], qta)
+                    target_qty[target_variant["inventoryItem"]["id"]] = qta
                     logger.info("  ✓ Taglia %s: Qta=%d", taglia or "unica", qta)
                 else:
                     logger.warning("  ✗ Variante non trovata per TAGLIA=%s", taglia)
+
+            # Le varianti del duplicato non ancora stoccate in Promo (livelli letti
+            # dalla risposta del duplicate) vengono attivate subito a onHand=0:
+            # il batch non fallisce e non ricade su activate + set per variante.
+            # Un errore qui NON interrompe lo SKU: l'outlet è già ACTIVE, la pulizia
+            # Magazzino e il write-back devono comunque girare.
+            promo_gid = f"gid://shopify/Location/{promo['id']}"
+            for item_gid in _unstocked_items(dup_variants, promo_gid):
+                try:
+                    inventory_activate(shop, item_gid, promo_gid, on_hand=0)
+                except Exception as e:
+                    logger.warning("Errore attivazione Promo item=%s: %s", item_gid, e)
+
+            # UNA mutation inventorySetQuantities per tutte le varianti (invece di
+            # connect + sleep + set per variante e un set per taglia)
+            try:
+                inventory_set_quantities_bulk(
+                    shop, [(item_gid, promo_gid, qty) for item_gid, qty in target_qty.items()]
+                )
+                logger.info("Inventario Promo impostato su %d varianti", len(target_qty))
+            except Exception as e:
+                logger.warning("Errore inventario Promo: %s", e)
     
     # FIX CRITICO: Gestione inventario Magazzino
     # Quando si duplica un prodotto, Shopify EREDITA gli inventory levels dal sorgente!
@@ -868,37 +1038,47 @@ def process_sku_group(shop: Shopify, sku: str, rows: List[Dict[str, Any]], ws, c
     if mag:
         if mag_name:  # Log solo se cercato by name
             logger.info("Location Magazzino trovata: ID=%s Nome='%s'", mag["id"], mag["name"])
-            variants = shop.get_product_variants(outlet_gid)
-            disconnected = 0
-            for v in variants:
-                inv_id = int(_gid_numeric(v["inventoryItem"]["id"]))
-                try:
-                    # STEP 1: AZZERA la quantità (eredita stock dal sorgente!)
-                    logger.debug("Azzerando stock Magazzino per item=%s", inv_id)
-                    shop.inventory_set(inv_id, mag["id"], 0)
-                    
-                    # STEP 2: ORA disconnetti (funziona solo se stock = 0)
-                    shop.inventory_delete_level(inv_id, mag["id"])
-                    disconnected += 1
-                    logger.debug("Disconnesso inventory item=%s da Magazzino", inv_id)
-                except Exception as e:
-                    # Se fallisce potrebbe essere già disconnesso o problema API
-                    logger.warning("Errore gestione Magazzino item=%s: %s", inv_id, e)
-            logger.info("Inventario Magazzino: %d varianti azzerate e disconnesse", disconnected)
-        else:
-            logger.error("⚠️ Location Magazzino NON TROVATA! Nome cercato: '%s'", mag_name)
-            logger.error("⚠️ Verifica MAGAZZINO_LOCATION_NAME e che corrisponda ESATTAMENTE al nome su Shopify")
+
+        # STEP 1: AZZERA la quantità (eredita stock dal sorgente!) — una sola
+        # mutation per tutte le varianti
+        mag_gid = f"gid://shopify/Location/{mag['id']}"
+        try:
+            inventory_set_quantities_bulk(
+                shop, [(v["inventoryItem"]["id"], mag_gid, 0) for v in variants]
+            )
+        except Exception as e:
+            logger.warning("Errore azzeramento Magazzino: %s", e)
+
+        # STEP 2: ORA disconnetti (funziona solo se stock = 0) — i livelli
+        # Magazzino arrivano dalla risposta del duplicate: UNA mutation con un
+        # inventoryDeactivate per livello, invece di un DELETE REST per variante
+        level_ids, unknown = _location_level_ids(dup_variants, mag_gid)
+        for item_gid in unknown:
+            try:
+                level_id = get_inventory_level_id(shop, item_gid, mag_gid)
+            except Exception as e:
+                logger.warning("Errore lettura livello Magazzino item=%s: %s", item_gid, e)
+                continue
+            if level_id:
+                level_ids.append(level_id)
+        try:
+            inventory_deactivate_bulk(shop, level_ids)
+            logger.info("Inventario Magazzino: %d varianti azzerate e disconnesse", len(level_ids))
+        except Exception as e:
+            # Se fallisce potrebbe essere già disconnesso o problema API
+            logger.warning("Errore disconnessione Magazzino: %s", e)
+    elif mag_name:
+        logger.error("⚠️ Location Magazzino NON TROVATA! Nome cercato: '%s'", mag_name)
+        logger.error("⚠️ Verifica MAGAZZINO_LOCATION_NAME e che corrisponda ESATTAMENTE al nome su Shopify")
     else:
         logger.warning("⚠️ MAGAZZINO_LOCATION_NAME non settata - skip gestione Magazzino")
 
     # 11. Write-back Product_Id per TUTTE le righe del gruppo
-    if ws:
-        for row in rows:
-            if "_row_index" in row:
-                try:
-                    gs_write_product_id(ws, row["_row_index"], col_index, outlet_gid)
-                except Exception as e:
-                    logger.warning("Write-back fallito per riga %d: %s", row["_row_index"], e)
+    pairs = [(row["_row_index"], outlet_gid) for row in rows if "_row_index" in row]
+    if writebacks is not None:
+        writebacks.extend(pairs)
+    elif ws:
+        gs_write_product_ids(ws, col_index, pairs)
 
     logger.info("✅ SKU=%s completato (%d taglie)", sku, len(rows))
     return "SUCCESS"
@@ -915,8 +1095,9 @@ def main():
     # Leggi dati da Google Sheets
     rows, col_index, ws = gs_read_rows()
     
-    # Filtra righe
-    selected = []
+    # Filtra e raggruppa per SKU in un solo passaggio (gestione multi-taglia)
+    grouped_by_sku: Dict[str, List[Dict[str, Any]]] = {}
+    n_selected = 0
     for row in rows:
         # Check online=SI
         online = row.get("online", "")
@@ -933,53 +1114,84 @@ def main():
         if qta <= 0:
             continue
         
-        selected.append(row)
-    
-    logger.info("Righe selezionate: %d/%d (online=SI e Qta>0)", len(selected), len(rows))
-    
-    if not selected:
-        logger.info("Nessuna riga da processare")
-        return
-    
-    # RAGGRUPPAMENTO PER SKU (gestione multi-taglia)
-    grouped_by_sku = {}
-    for row in selected:
+        n_selected += 1
         sku = (row.get("sku") or "").strip()
         if not sku:
             logger.warning("Riga %d: SKU mancante, skip", row.get("_row_index", "?"))
             continue
-        
-        if sku not in grouped_by_sku:
-            grouped_by_sku[sku] = []
-        grouped_by_sku[sku].append(row)
+        grouped_by_sku.setdefault(sku, []).append(row)
+    
+    logger.info("Righe selezionate: %d/%d (online=SI e Qta>0)", n_selected, len(rows))
+    
+    if not n_selected:
+        logger.info("Nessuna riga da processare")
+        return
     
     logger.info("Prodotti unici (per SKU): %d", len(grouped_by_sku))
-    logger.info("Taglie totali: %d", len(selected))
+    logger.info("Taglie totali: %d", n_selected)
     
-    # Log riepilogo raggruppamento
-    for sku, sku_rows in grouped_by_sku.items():
-        taglie = [r.get("taglia", "") for r in sku_rows]
-        logger.info("  - SKU=%s: %d taglie %s", sku, len(sku_rows), taglie)
+    # Log riepilogo raggruppamento (la lista taglie si costruisce solo se loggata)
+    if logger.isEnabledFor(logging.INFO):
+        for sku, sku_rows in grouped_by_sku.items():
+            taglie = [r.get("taglia", "") for r in sku_rows]
+            logger.info("  - SKU=%s: %d taglie %s", sku, len(sku_rows), taglie)
     
     # Inizializza Shopify
     shop = Shopify()
+
+    # Pre-carica le location cercate by name una volta sola, prima del loop:
+    # il GET /locations.json non cade più a metà del primo SKU.
+    if grouped_by_sku and (
+        (os.environ.get("PROMO_LOCATION_NAME") and not os.environ.get("PROMO_LOCATION_ID"))
+        or (os.environ.get("MAGAZZINO_LOCATION_NAME") and not os.environ.get("MAGAZZINO_LOCATION_ID"))
+    ):
+        try:
+            shop.get_location_by_name(os.environ.get("PROMO_LOCATION_NAME") or os.environ["MAGAZZINO_LOCATION_NAME"])
+        except Exception as e:
+            # Es. 403 senza read_locations: ogni SKU riproverà (e loggherà) da sé
+            logger.warning("Pre-caricamento location fallito: %s", e)
     
     # Processa per SKU (non per riga!)
     stats = {"success": 0, "skip_active": 0, "skip_source": 0, "errors": 0, "taglie_gestite": 0}
+    # Write-back Product_Id accodati da tutti gli SKU e scritti con UN
+    # batch_update a fine run (nel finally: anche su eccezione/interruzione).
+    # SHEET_WRITEBACK_EVERY=N (>0) scrive anche ogni N SKU, se si preferisce
+    # limitare gli ID esposti a un crash del processo. Un flush fallito resta
+    # in coda e viene ritentato al successivo.
+    flush_every = max(0, int(os.environ.get("SHEET_WRITEBACK_EVERY", "0")))
+    writebacks: List[Tuple[int, str]] = []
+    can_write = bool(ws and col_index.get("product_id"))
+    if not can_write:
+        logger.error("Colonna Product_Id non trovata: gli ID NON verranno scritti sul foglio")
     
-    for sku, sku_rows in grouped_by_sku.items():
-        try:
-            result = process_sku_group(shop, sku, sku_rows, ws, col_index)
-            if result == "SUCCESS":
-                stats["success"] += 1
-                stats["taglie_gestite"] += len(sku_rows)
-            elif result == "SKIP_ALREADY_ACTIVE":
-                stats["skip_active"] += 1
-            elif result == "SKIP_NO_SOURCE":
-                stats["skip_source"] += 1
-        except Exception as e:
-            logger.error("Errore processando SKU=%s: %s", sku, e, exc_info=True)
-            stats["errors"] += 1
+    def flush():
+        if not writebacks:
+            return
+        if not can_write:
+            # Niente da ritentare: log delle coppie e coda svuotata
+            logger.error("Write-back Product_Id scartato, coppie (riga, gid): %s", list(writebacks))
+            writebacks.clear()
+        elif gs_write_product_ids(ws, col_index, writebacks):
+            writebacks.clear()
+    
+    try:
+        for n, (sku, sku_rows) in enumerate(grouped_by_sku.items(), 1):
+            try:
+                result = process_sku_group(shop, sku, sku_rows, ws, col_index, writebacks)
+                if result == "SUCCESS":
+                    stats["success"] += 1
+                    stats["taglie_gestite"] += len(sku_rows)
+                elif result == "SKIP_ALREADY_ACTIVE":
+                    stats["skip_active"] += 1
+                elif result == "SKIP_NO_SOURCE":
+                    stats["skip_source"] += 1
+            except Exception as e:
+                logger.error("Errore processando SKU=%s: %s", sku, e, exc_info=True)
+                stats["errors"] += 1
+            if flush_every and n % flush_every == 0:
+                flush()
+    finally:
+        flush()
     
     # Report finale
     logger.info("=" * 60)
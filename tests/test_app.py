@@ -234,3 +234,50 @@ def test_error_boundary_auth_not_configured_503(monkeypatch):
                      audit_factory=lambda: None, promo_location_id="gid://shopify/Location/PROMO")
     r = _client(app).get("/scansia", headers={"Authorization": _basic("racoon", "x")})
     assert r.status_code == 503
+
+
+def test_default_transport_factory_reuses_one_transport(monkeypatch):
+    """Production default: every job gets the SAME transport (one session, one
+    keep-alive connection, one throttle) instead of a fresh one per job."""
+    pytest.importorskip("fastapi")
+    pytest.importorskip("httpx")
+    from fastapi.testclient import TestClient
+
+    from backend.app import create_app
+    from backend.config import ShopifyConfig
+    from backend.shopify.transport import ShopifyTransport
+
+    cfg = ShopifyConfig("t.myshopify.com", "shpat_x", "2025-07", "gid://shopify/Location/PROMO")
+    app = create_app(config=cfg, sheet_factory=lambda: None, audit_factory=lambda: None,
+                     promo_location_id="gid://shopify/Location/PROMO")
+    with TestClient(app):
+        first = app.state.transport_factory()
+        assert isinstance(first, ShopifyTransport)
+        assert app.state.transport_factory() is first
+
+
+def test_default_sheet_factory_opens_the_worksheet_once(monkeypatch):
+    """Production default: the gspread auth + open round-trips happen on first
+    use only; later routes/jobs reuse the same handle."""
+    pytest.importorskip("fastapi")
+    pytest.importorskip("httpx")
+    from fastapi.testclient import TestClient
+
+    from backend.app import create_app
+    from backend.config import ShopifyConfig
+    from backend.gsheet import ScansiaSheet
+
+    opened = []
+
+    def fake_open():
+        opened.append(1)
+        return ScansiaSheet(ws=object())
+
+    monkeypatch.setattr(ScansiaSheet, "open", fake_open)
+    cfg = ShopifyConfig("t.myshopify.com", "shpat_x", "2025-07", "gid://shopify/Location/PROMO")
+    app = create_app(config=cfg, transport_factory=lambda: None, audit_factory=lambda: None,
+                     promo_location_id="gid://shopify/Location/PROMO")
+    with TestClient(app):
+        first = app.state.sheet_factory()
+        assert app.state.sheet_factory() is first
+    assert opened == [1]
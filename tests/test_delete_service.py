@@ -117,8 +117,10 @@ class OpsMock:
         monkeypatch.setattr(ops, "product_update_status", self._status)
         monkeypatch.setattr(ops, "get_product_core", self._core)
         monkeypatch.setattr(ops, "get_product_variants", self._variants)
+        monkeypatch.setattr(ops, "get_product_variant_prices", self._variants)
         monkeypatch.setattr(ops, "get_product_metafields", self._mf)
         monkeypatch.setattr(ops, "get_product_media", self._media)
+        monkeypatch.setattr(ops, "get_product_bundle", self._bundle)
 
     def _enumerate(self, t, collection_gid=ops.OUTLET_COLLECTION_GID):
         self.log.append(("enumerate", collection_gid))
@@ -142,6 +144,9 @@ class OpsMock:
 
     def _core(self, t, gid):
         self.log.append(("core", gid))
+        return self._core_value(gid)
+
+    def _core_value(self, gid):
         return self.core_by_gid.get(gid, {
             "id": gid, "title": "T", "handle": "h", "status": "DRAFT",
             "tags": [], "collections": [],
@@ -159,6 +164,15 @@ class OpsMock:
         self.log.append(("media", gid))
         return list(self.media_by_gid.get(gid, []))
 
+    def _bundle(self, t, gid, *, core=None):
+        self.log.append(("bundle", gid) if core is None else ("bundle_without_core", gid))
+        return {
+            "core": self._core_value(gid) if core is None else core,
+            "variants": [dict(v) for v in self.variants_by_gid.get(gid, [])],
+            "metafields": list(self.mf_by_gid.get(gid, [])),
+            "media": list(self.media_by_gid.get(gid, [])),
+        }
+
 
 # ---------------------------------------------------------------------------
 # Predicate (per-variant, exact)
@@ -329,7 +343,7 @@ def test_cleanup_abort_on_snapshot_failure_never_deletes(monkeypatch):
 
 
 def test_cleanup_snapshot_build_failed_skips_never_deletes(monkeypatch):
-    """A read op for the snapshot itself (e.g. get_product_core) raising ->
+    """The snapshot's read op itself (the fused get_product_bundle) raising ->
     STATUS_SNAPSHOT_BUILD_FAILED, product_delete NEVER called (PRE-delete, safe
     per-outlet skip)."""
     G = "gid://shopify/Product/D2b"
@@ -338,9 +352,9 @@ def test_cleanup_snapshot_build_failed_skips_never_deletes(monkeypatch):
             inv_by_gid={G: [_inv_variant("v1", promo_available=0)]},
             variants_by_gid={G: [_snap_variant()]})
 
-    def _boom_core(t, gid):
-        raise RuntimeError("core read failed")
-    monkeypatch.setattr(ops, "get_product_core", _boom_core)
+    def _boom_bundle(t, gid):
+        raise RuntimeError("snapshot read failed")
+    monkeypatch.setattr(ops, "get_product_bundle", _boom_bundle)
 
     sheet, audit = FakeSheet(rows=[_row("SKU", G)]), FakeAudit(log=log)
     plan = ds.cleanup_preview(object(), promo_location_id=PROMO)
@@ -494,6 +508,24 @@ def test_single_delete_accepts_outlet_by_collection_membership(monkeypatch):
     assert ("product_delete", G) in log
 
 
+def test_single_delete_reuses_gate_core_read_for_snapshot(monkeypatch):
+    """Single delete = the gate's core read + ONE fused snapshot read, and the
+    snapshot records the core the gate judged."""
+    G = "gid://shopify/Product/ONECORE"
+    log: List[tuple] = []
+    OpsMock(monkeypatch, log=log, variants_by_gid={G: [_snap_variant()]},
+            core_by_gid={G: {"id": G, "title": "Sneaker X - Outlet", "handle": "h",
+                             "status": "DRAFT", "tags": ["t"], "collections": []}})
+    sheet, audit = FakeSheet(rows=[_row("SKU", G)]), FakeAudit(log=log)
+    out = ds.delete_single_apply(object(), sheet, audit, G, human_gesture="CONFERMO")
+    assert out.status == ds.STATUS_DELETED
+    assert log.count(("core", G)) == 1
+    assert log.count(("bundle_without_core", G)) == 1
+    assert ("bundle", G) not in log
+    assert not any(c[0] in ("variants", "mf", "media") for c in log)
+    assert audit.durable[0].title == "Sneaker X - Outlet" and audit.durable[0].tags == ("t",)
+
+
 # ---------------------------------------------------------------------------
 # Reconstructive snapshot fields
 # ---------------------------------------------------------------------------
@@ -20,6 +20,8 @@ from backend.gsheet import (
     UUID_HEADER,
     CutoverNotDoneError,
     ScansiaSheet,
+    _clean_price,
+    _norm_key,
 )
 
 
@@ -107,6 +109,39 @@ def test_parse_qta_table(raw, value, anomaly):
     assert (qp.value, qp.anomaly) == (value, anomaly)
 
 
+@pytest.mark.parametrize(
+    "raw,expected",
+    [
+        ("129", "129.00"),
+        ("129.9", "129.90"),
+        ("€ 129", "129.00"),
+        ("129,90", "129.90"),
+        ("1.299,90", None),
+        ("1e5", "15.00"),
+        ("", None),
+        ("abc", None),
+        (None, None),
+        (59.5, "59.50"),
+    ],
+)
+def test_clean_price_table(raw, expected):
+    assert _clean_price(raw) == expected
+
+
+@pytest.mark.parametrize(
+    "raw,expected",
+    [
+        ("  Prezzo Outlet ", "prezzo_outlet"),
+        ("Product-ID", "product_id"),
+        ("row_uuid", "row_uuid"),
+        ("", ""),
+        (None, ""),
+    ],
+)
+def test_norm_key_table(raw, expected):
+    assert _norm_key(raw) == expected
+
+
 # ---------------------------------------------------------------------------
 # CI-1 — backfill DoD: no re-inflate
 # ---------------------------------------------------------------------------
@@ -0,0 +1,577 @@
+"""src.sync — legacy ``Shopify`` client + ``process_sku_group``.
+
+The HTTP session is replaced by an in-memory fake (``FakeSession``): the real
+``graphql``/``_request`` loops run, every GraphQL document and REST call is
+recorded, and responses are routed by document name. No network, no live
+store, per project rule.
+"""
+from __future__ import annotations
+
+import json
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pytest
+
+from backend.shopify import ops
+from backend.shopify.transport import _compact_query
+from src import sync
+
+PROMO = "gid://shopify/Location/11"
+MAG = "gid://shopify/Location/22"
+SRC = "gid://shopify/Product/1"
+DUP = "gid://shopify/Product/2"
+
+# compacted query text -> constant name, for every document the client may send
+_DOCS = {
+    _compact_query(v): name
+    for mod in (sync, ops)
+    for name, v in vars(mod).items()
+    if name.startswith("_") and name.isupper() and isinstance(v, str) and "{" in v
+}
+
+
+def _dynamic_doc(query: str) -> str:
+    """Name of a document built per call (not a module constant)."""
+    if "inventoryDeactivate(" in query:
+        return "inventory_deactivate_bulk"
+    raise KeyError(query)
+
+
+class FakeResponse:
+    def __init__(self, status_code: int = 200, body: Any = None, headers: Optional[Dict[str, str]] = None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.content = b"" if body is None else json.dumps(body).encode("utf-8")
+        self.text = self.content.decode("utf-8")
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class FakeSession:
+    """Stand-in for ``requests.Session``. ``graphql_routes`` maps a document
+    name to ``variables -> data`` (wrapped as ``{"data": ...}``, or a
+    ``FakeResponse`` returned as is); ``rest_routes``
+    maps ``(METHOD, path)`` to a body or a ``FakeResponse``."""
+
+    def __init__(self, graphql_routes: Dict[str, Callable[[Dict[str, Any]], Any]],
+                 rest_routes: Optional[Dict[Tuple[str, str], Any]] = None):
+        self.graphql_routes = graphql_routes
+        self.rest_routes = rest_routes or {}
+        self.graphql_calls: List[Tuple[str, Dict[str, Any]]] = []
+        self.rest_calls: List[Tuple[str, str]] = []
+        self.rest_json: List[Any] = []
+
+    def post(self, url, data=None, **kw):
+        payload = json.loads(data)
+        name = _DOCS.get(payload["query"]) or _dynamic_doc(payload["query"])
+        self.graphql_calls.append((name, payload["variables"]))
+        res = self.graphql_routes[name](payload["variables"])
+        return res if isinstance(res, FakeResponse) else FakeResponse(body={"data": res})
+
+    def request(self, method, url, **kw):
+        path = url.split("/admin/api/", 1)[1].split("/", 1)[1]
+        path = "/" + path
+        self.rest_calls.append((method, path))
+        if kw.get("data") is not None:
+            self.rest_json.append(json.loads(kw["data"]))
+        res = self.rest_routes.get((method, path), {})
+        return res if isinstance(res, FakeResponse) else FakeResponse(body=res)
+
+    @property
+    def documents(self) -> List[str]:
+        return [name for name, _ in self.graphql_calls]
+
+
+@pytest.fixture
+def shop(monkeypatch) -> sync.Shopify:
+    monkeypatch.setenv("SHOPIFY_STORE", "test-store.myshopify.com")
+    monkeypatch.setenv("SHOPIFY_ADMIN_TOKEN", "shpat_test_token")
+    monkeypatch.setattr(sync.time, "sleep", lambda s: None)
+    s = sync.Shopify()
+    s.min_interval = 0.0
+    return s
+
+
+def _level(i: int, location: str) -> str:
+    return f"gid://shopify/InventoryLevel/{location.rpartition('/')[2]}?inventory_item_id={i}"
+
+
+def _variant(i: int, size: str, locations: List[str]) -> Dict[str, Any]:
+    return {
+        "id": f"gid://shopify/ProductVariant/{i}", "sku": "SKU1", "title": size,
+        "price": "129.90", "compareAtPrice": None,
+        "inventoryItem": {
+            "id": f"gid://shopify/InventoryItem/{i}",
+            "inventoryLevels": {
+                "edges": [{"node": {"id": _level(i, loc), "location": {"id": loc}}} for loc in locations],
+                "pageInfo": {"hasNextPage": False},
+            },
+        },
+        "selectedOptions": [{"name": "Taglia", "value": size}],
+    }
+
+
+def _sku_group_routes(dup_variants: List[Dict[str, Any]]) -> Dict[str, Callable]:
+    """Routes for one full create of SKU1 (source found, no outlet yet)."""
+    edges = lambda vs: {"edges": [{"node": v} for v in vs]}
+    return {
+        "_FIND_SOURCE_BY_SKU": lambda v: {"products": edges([{
+            "id": SRC, "title": "Air", "handle": "air", "status": "ACTIVE",
+            "variants": edges([{"id": "v", "sku": "SKU1", "title": "42",
+                                "selectedOptions": [], "inventoryItem": {"id": "i"}}]),
+        }])},
+        "_FIND_OUTLET_BY_SKU": lambda v: {"products": edges([])},
+        "_PRODUCT_DUPLICATE": lambda v: {"productDuplicate": {
+            "newProduct": {"id": DUP, "title": "Air - Outlet", "handle": "air-1",
+                           "status": "DRAFT", "variants": edges(dup_variants)},
+            "userErrors": [],
+        }},
+        "_PRODUCT_SET_FILES": lambda v: {"productSet": {"product": {"id": DUP}, "userErrors": []}},
+        "_GET_PRODUCT_METAFIELDS": lambda v: {"node": {"metafields": edges([])}},
+        "_GET_PRODUCT_COLLECTIONS": lambda v: {"node": {"collections": edges([])}},
+        "_VARIANTS_BULK_UPDATE": lambda v: {"productVariantsBulkUpdate": {
+            "product": {"id": DUP},
+            "productVariants": [dict(u, sku="SKU1", title=d["title"],
+                                     inventoryItem={"id": d["inventoryItem"]["id"]},
+                                     selectedOptions=d["selectedOptions"])
+                                for u, d in zip(v["variants"], dup_variants)],
+            "userErrors": [],
+        }},
+        "_INVENTORY_ACTIVATE": lambda v: {"inventoryActivate": {"inventoryLevel": {"id": "lvl"}, "userErrors": []}},
+        "_INVENTORY_SET_QUANTITIES": lambda v: {"inventorySetQuantities": {
+            "inventoryAdjustmentGroup": None, "userErrors": []}},
+        "inventory_deactivate_bulk": lambda v: {f"d{j}": {"userErrors": []} for j in range(len(v))},
+    }
+
+
+def _rows():
+    return [
+        {"sku": "SKU1", "taglia": "42", "qta": "2", "_row_index": 2,
+         "prezzo_high": "129,90", "prezzo_outlet": "99,90"},
+        {"sku": "SKU1", "taglia": "43", "qta": "1", "_row_index": 3,
+         "prezzo_high": "129,90", "prezzo_outlet": "99,90"},
+    ]
+
+
+# ---------------------------------------------------------------------------
+# process_sku_group — Promo inventory
+# ---------------------------------------------------------------------------
+def test_promo_activates_sizes_not_stocked_there_before_the_batch(shop, monkeypatch):
+    monkeypatch.setenv("PROMO_LOCATION_ID", "11")
+    monkeypatch.delenv("MAGAZZINO_LOCATION_ID", raising=False)
+    monkeypatch.delenv("MAGAZZINO_LOCATION_NAME", raising=False)
+    dup = [_variant(42, "42", [MAG]), _variant(43, "43", [PROMO, MAG])]
+    shop.sess = FakeSession(_sku_group_routes(dup))
+
+    assert sync.process_sku_group(shop, "SKU1", _rows(), None, {}, []) == "SUCCESS"
+
+    activates = [v for n, v in shop.sess.graphql_calls if n == "_INVENTORY_ACTIVATE"]
+    assert activates == [{"inventoryItemId": "gid://shopify/InventoryItem/42",
+                          "locationId": PROMO, "available": None, "onHand": 0}]
+    # one batch, no not-stocked fallback
+    sets = [v for n, v in shop.sess.graphql_calls if n == "_INVENTORY_SET_QUANTITIES"]
+    assert len(sets) == 1
+    assert sets[0]["input"]["quantities"] == [
+        {"inventoryItemId": "gid://shopify/InventoryItem/42", "locationId": PROMO, "quantity": 2},
+        {"inventoryItemId": "gid://shopify/InventoryItem/43", "locationId": PROMO, "quantity": 1},
+    ]
+
+
+def test_promo_inventory_errors_do_not_skip_magazzino_or_write_back(shop, monkeypatch, caplog):
+    monkeypatch.setenv("PROMO_LOCATION_ID", "11")
+    monkeypatch.setenv("MAGAZZINO_LOCATION_ID", "22")
+    monkeypatch.delenv("MAGAZZINO_LOCATION_NAME", raising=False)
+    dup = [_variant(42, "42", [MAG]), _variant(43, "43", [PROMO, MAG])]
+    routes = _sku_group_routes(dup)
+    routes["_INVENTORY_ACTIVATE"] = lambda v: FakeResponse(400)
+    ok = routes["_INVENTORY_SET_QUANTITIES"]
+    routes["_INVENTORY_SET_QUANTITIES"] = lambda v: (
+        {"inventorySetQuantities": {"inventoryAdjustmentGroup": None,
+                                    "userErrors": [{"field": ["input"], "message": "denied"}]}}
+        if v["input"]["quantities"][0]["locationId"] == PROMO else ok(v))
+    shop.sess = FakeSession(routes)
+    writebacks: List[Tuple[int, str]] = []
+
+    assert sync.process_sku_group(shop, "SKU1", _rows(), None, {}, writebacks) == "SUCCESS"
+
+    warnings = [r.getMessage() for r in caplog.records if r.levelname == "WARNING"]
+    assert any("attivazione Promo" in w for w in warnings)
+    assert any("inventario Promo" in w and "userError" in w for w in warnings)
+    # Magazzino zeroed and disconnected, Product_Id queued
+    mag_sets = [v["input"]["quantities"] for n, v in shop.sess.graphql_calls
+                if n == "_INVENTORY_SET_QUANTITIES" and v["input"]["quantities"][0]["locationId"] == MAG]
+    assert [[q["quantity"] for q in qs] for qs in mag_sets] == [[0, 0]]
+    deactivated = [v for n, v in shop.sess.graphql_calls if n == "inventory_deactivate_bulk"]
+    assert deactivated == [{"l0": _level(42, MAG), "l1": _level(43, MAG)}]
+    assert writebacks == [(2, DUP), (3, DUP)]
+
+
+def test_magazzino_disconnect_is_one_batched_deactivate(shop, monkeypatch):
+    monkeypatch.delenv("PROMO_LOCATION_ID", raising=False)
+    monkeypatch.delenv("PROMO_LOCATION_NAME", raising=False)
+    monkeypatch.setenv("MAGAZZINO_LOCATION_ID", "22")
+    truncated = _variant(44, "44", [MAG])
+    truncated["inventoryItem"]["inventoryLevels"]["pageInfo"]["hasNextPage"] = True
+    dup = [_variant(42, "42", [MAG]), _variant(43, "43", [PROMO]), truncated]
+    routes = _sku_group_routes(dup)
+    routes["_GET_INVENTORY_LEVEL_ID"] = lambda v: {"inventoryItem": {"inventoryLevel": {"id": _level(44, MAG)}}}
+    shop.sess = FakeSession(routes)
+
+    assert sync.process_sku_group(shop, "SKU1", _rows(), None, {}, []) == "SUCCESS"
+
+    # zero first, then one deactivate for the levels at Magazzino; only the
+    # truncated variant is looked up; no REST inventory_levels DELETE
+    assert shop.sess.documents[-3:] == [
+        "_INVENTORY_SET_QUANTITIES", "_GET_INVENTORY_LEVEL_ID", "inventory_deactivate_bulk"]
+    assert dict(shop.sess.graphql_calls)["inventory_deactivate_bulk"] == {
+        "l0": _level(42, MAG), "l1": _level(44, MAG)}
+    assert not any(path == "/inventory_levels.json" for _, path in shop.sess.rest_calls)
+
+
+def test_unstocked_items_skips_truncated_levels():
+    truncated = _variant(44, "44", [MAG])
+    truncated["inventoryItem"]["inventoryLevels"]["pageInfo"]["hasNextPage"] = True
+    variants = [_variant(42, "42", [MAG]), _variant(43, "43", [PROMO]), truncated]
+    assert sync._unstocked_items(variants, PROMO) == ["gid://shopify/InventoryItem/42"]
+
+
+# ---------------------------------------------------------------------------
+# process_sku_group — round-trips of one create
+# ---------------------------------------------------------------------------
+def test_create_sends_exact_document_sequence_and_seeds_duplicate_variants(shop, monkeypatch):
+    monkeypatch.setenv("PROMO_LOCATION_ID", "11")
+    monkeypatch.delenv("MAGAZZINO_LOCATION_ID", raising=False)
+    monkeypatch.delenv("MAGAZZINO_LOCATION_NAME", raising=False)
+    dup = [_variant(42, "42", [MAG]), _variant(43, "43", [PROMO, MAG])]
+    shop.sess = FakeSession(_sku_group_routes(dup))
+    seeded: List[Tuple[str, Dict[str, Any], Dict[str, Any]]] = []
+    seed = shop._seed_cached
+    monkeypatch.setattr(shop, "_seed_cached",
+                        lambda q, v, d: (seeded.append((_DOCS[_compact_query(q)], v, d)), seed(q, v, d)))
+
+    assert sync.process_sku_group(shop, "SKU1", _rows(), None, {}, []) == "SUCCESS"
+
+    # No _GET_PRODUCT_VARIANTS: the duplicate's variants feed the price update,
+    # the price update's variants feed the inventory steps
+    assert shop.sess.documents == [
+        "_FIND_SOURCE_BY_SKU",
+        "_FIND_OUTLET_BY_SKU",
+        "_PRODUCT_DUPLICATE",
+        "_PRODUCT_SET_FILES",
+        "_GET_PRODUCT_METAFIELDS",
+        "_GET_PRODUCT_COLLECTIONS",
+        "_VARIANTS_BULK_UPDATE",
+        "_INVENTORY_ACTIVATE",
+        "_INVENTORY_SET_QUANTITIES",
+    ]
+    assert shop.sess.rest_calls == [("PUT", "/products/2.json"), ("GET", "/products/1/images.json")]
+
+    name, variables, data = seeded[0]
+    assert (name, variables) == ("_GET_PRODUCT_VARIANTS", {"id": DUP})
+    assert [e["node"] for e in data["node"]["variants"]["edges"]] == dup
+    prices = dict(shop.sess.graphql_calls)["_VARIANTS_BULK_UPDATE"]
+    assert [u["id"] for u in prices["variants"]] == [v["id"] for v in dup]
+
+
+# ---------------------------------------------------------------------------
+# Product_Id write-back
+# ---------------------------------------------------------------------------
+class FakeWorksheet:
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.batches: List[List[Dict[str, Any]]] = []
+
+    def batch_update(self, data, raw=True):
+        if self.fail:
+            raise RuntimeError("quota exceeded")
+        self.batches.append(data)
+
+
+def test_gs_write_product_id_single_row():
+    ws = FakeWorksheet()
+    assert sync.gs_write_product_id(ws, 5, {"product_id": 17}, DUP) is True
+    assert ws.batches == [[{"range": "Q5", "values": [[DUP]]}]]
+
+
+def test_failed_writeback_logs_unwritten_pairs_at_error(caplog):
+    ws = FakeWorksheet(fail=True)
+    assert sync.gs_write_product_ids(ws, {"product_id": 17}, [(2, DUP), (3, DUP)]) is False
+    errors = [r for r in caplog.records if r.levelname == "ERROR"]
+    assert len(errors) == 1
+    assert "(2, 'gid://shopify/Product/2')" in errors[0].getMessage()
+
+
+def test_main_writes_back_once_at_end_of_run_by_default(monkeypatch):
+    ws = FakeWorksheet()
+    rows = [{"sku": s, "online": "SI", "qta": "1", "_row_index": i} for i, s in enumerate("ABC", 2)]
+    monkeypatch.setattr(sync, "gs_read_rows", lambda: (rows, {"product_id": 17}, ws))
+    monkeypatch.setattr(sync, "Shopify", lambda: object())
+    monkeypatch.delenv("PROMO_LOCATION_NAME", raising=False)
+    monkeypatch.delenv("MAGAZZINO_LOCATION_NAME", raising=False)
+    monkeypatch.delenv("SHEET_WRITEBACK_EVERY", raising=False)
+    monkeypatch.setattr("sys.argv", ["sync.py", "--apply"])
+
+    def fake_group(shop, sku, sku_rows, ws_, col_index, writebacks):
+        assert ws.batches == []
+        if sku == "C":
+            raise RuntimeError("boom")
+        writebacks.extend((r["_row_index"], f"gid://shopify/Product/{sku}") for r in sku_rows)
+        return "SUCCESS"
+
+    monkeypatch.setattr(sync, "process_sku_group", fake_group)
+    sync.main()
+
+    assert ws.batches == [[
+        {"range": "Q2", "values": [["gid://shopify/Product/A"]]},
+        {"range": "Q3", "values": [["gid://shopify/Product/B"]]},
+    ]]
+
+
+def test_main_flushes_writebacks_after_each_sku(monkeypatch):
+    ws = FakeWorksheet()
+    rows = [
+        {"sku": "A", "online": "SI", "qta": "1", "_row_index": 2},
+        {"sku": "B", "online": "SI", "qta": "1", "_row_index": 3},
+        {"sku": "C", "online": "SI", "qta": "1", "_row_index": 4},
+    ]
+    monkeypatch.setattr(sync, "gs_read_rows", lambda: (rows, {"product_id": 17}, ws))
+    monkeypatch.setattr(sync, "Shopify", lambda: object())
+    monkeypatch.delenv("PROMO_LOCATION_NAME", raising=False)
+    monkeypatch.delenv("MAGAZZINO_LOCATION_NAME", raising=False)
+    monkeypatch.setenv("SHEET_WRITEBACK_EVERY", "1")
+    monkeypatch.setattr("sys.argv", ["sync.py", "--apply"])
+    batches_at_call: List[int] = []
+
+    def fake_group(shop, sku, sku_rows, ws_, col_index, writebacks):
+        batches_at_call.append(len(ws.batches))
+        if sku == "C":
+            raise RuntimeError("boom")
+        writebacks.extend((r["_row_index"], f"gid://shopify/Product/{sku}") for r in sku_rows)
+        return "SUCCESS"
+
+    monkeypatch.setattr(sync, "process_sku_group", fake_group)
+    sync.main()
+
+    # A's ID is on the sheet before B starts; a failing SKU writes nothing
+    assert batches_at_call == [0, 1, 2]
+    assert ws.batches == [
+        [{"range": "Q2", "values": [["gid://shopify/Product/A"]]}],
+        [{"range": "Q3", "values": [["gid://shopify/Product/B"]]}],
+    ]
+
+
+def test_main_drops_writebacks_when_product_id_column_missing(monkeypatch, caplog):
+    ws = FakeWorksheet()
+    rows = [{"sku": s, "online": "SI", "qta": "1", "_row_index": i} for i, s in enumerate("AB", 2)]
+    monkeypatch.setattr(sync, "gs_read_rows", lambda: (rows, {}, ws))
+    monkeypatch.setattr(sync, "Shopify", lambda: object())
+    monkeypatch.delenv("PROMO_LOCATION_NAME", raising=False)
+    monkeypatch.delenv("MAGAZZINO_LOCATION_NAME", raising=False)
+    monkeypatch.setenv("SHEET_WRITEBACK_EVERY", "1")
+    monkeypatch.setattr("sys.argv", ["sync.py", "--apply"])
+    queued: List[int] = []
+
+    def fake_group(shop, sku, sku_rows, ws_, col_index, writebacks):
+        queued.append(len(writebacks))
+        writebacks.extend((r["_row_index"], f"gid://shopify/Product/{sku}") for r in sku_rows)
+        return "SUCCESS"
+
+    monkeypatch.setattr(sync, "process_sku_group", fake_group)
+    sync.main()
+
+    assert queued == [0, 0]  # dropped after each flush, not retried
+    assert ws.batches == []
+    dropped = [r.getMessage() for r in caplog.records if "scartato" in r.getMessage()]
+    assert len(dropped) == 2
+    assert "(2, 'gid://shopify/Product/A')" in dropped[0]
+    assert "(3, 'gid://shopify/Product/B')" in dropped[1]
+
+
+# ---------------------------------------------------------------------------
+# Per-run read memo (_graphql_cached / _invalidate_cached)
+# ---------------------------------------------------------------------------
+def _variants_routes() -> Dict[str, Callable]:
+    return {
+        "_GET_PRODUCT_VARIANTS": lambda v: {"node": {"variants": {"edges": [
+            {"node": _variant(int(v["id"].rpartition("/")[2]), "42", [PROMO])}]}}},
+        "_VARIANTS_BULK_UPDATE": lambda v: {"productVariantsBulkUpdate": {
+            "product": {"id": v["productId"]}, "productVariants": [],
+            "userErrors": [{"field": ["price"], "message": "x"}]}},
+    }
+
+
+def test_read_memo_hit_skips_the_network(shop):
+    shop.sess = FakeSession(_variants_routes())
+    first = shop.get_product_variants(DUP)
+    assert shop.get_product_variants(DUP) == first
+    assert shop.get_product_variants(SRC) != first
+    assert shop.sess.documents == ["_GET_PRODUCT_VARIANTS"] * 2
+
+
+@pytest.mark.parametrize("mutate", [
+    lambda s: s.variants_bulk_update_prices(DUP, "99.90", "129.90"),
+    lambda s: s.update_product_basic(DUP, "air-outlet", "active", "outlet"),
+    lambda s: s.delete_product(DUP),
+], ids=["variants_bulk_update_prices", "update_product_basic", "delete_product"])
+def test_mutations_invalidate_the_product_reads(shop, mutate):
+    shop.sess = FakeSession(_variants_routes())
+    shop.get_product_variants(DUP)
+    shop.get_product_variants(SRC)
+
+    mutate(shop)
+    shop.get_product_variants(DUP)
+    shop.get_product_variants(SRC)
+
+    reads = [v["id"] for n, v in shop.sess.graphql_calls if n == "_GET_PRODUCT_VARIANTS"]
+    # only the mutated product is read again
+    assert reads == [DUP, SRC, DUP]
+
+
+def test_read_memo_evicts_least_recently_used_at_size_limit(shop):
+    shop.sess = FakeSession(_variants_routes())
+    shop._read_cache_size = 2
+    a, b, c = (f"gid://shopify/Product/{i}" for i in (10, 11, 12))
+    shop.get_product_variants(a)
+    shop.get_product_variants(b)
+    shop.get_product_variants(a)  # hit: a becomes most recent
+    shop.get_product_variants(c)  # evicts b
+
+    assert len(shop._read_cache) == 2
+    shop.get_product_variants(a)
+    shop.get_product_variants(b)
+    reads = [v["id"] for n, v in shop.sess.graphql_calls if n == "_GET_PRODUCT_VARIANTS"]
+    assert reads == [a, b, c, b]
+
+
+# ---------------------------------------------------------------------------
+# copy_images
+# ---------------------------------------------------------------------------
+_SRC_IMAGES = {"images": [
+    {"id": 502, "src": "https://cdn/b.jpg", "position": 2},
+    {"id": 501, "src": "https://cdn/a.jpg", "position": 1},
+]}
+
+
+def test_copy_images_replaces_files_in_one_product_set(shop, monkeypatch):
+    monkeypatch.delenv("ENABLE_BATCH_IMAGE_UPLOAD", raising=False)
+    shop.sess = FakeSession(
+        {"_PRODUCT_SET_FILES": lambda v: {"productSet": {"product": {"id": DUP}, "userErrors": []}}},
+        {("GET", "/products/1/images.json"): _SRC_IMAGES},
+    )
+
+    shop.copy_images(SRC, DUP)
+
+    assert shop.sess.graphql_calls == [("_PRODUCT_SET_FILES", {"input": {"id": DUP, "files": [
+        {"originalSource": "https://cdn/a.jpg", "alt": "", "contentType": "IMAGE"},
+        {"originalSource": "https://cdn/b.jpg", "alt": "", "contentType": "IMAGE"},
+    ]}})]
+    assert shop.sess.rest_calls == [("GET", "/products/1/images.json")]
+
+
+def test_copy_images_falls_back_to_rest_on_user_errors(shop, monkeypatch, caplog):
+    monkeypatch.delenv("ENABLE_BATCH_IMAGE_UPLOAD", raising=False)
+    shop.sess = FakeSession(
+        {"_PRODUCT_SET_FILES": lambda v: {"productSet": {
+            "product": None, "userErrors": [{"field": ["files"], "message": "bad"}]}}},
+        {("GET", "/products/1/images.json"): _SRC_IMAGES,
+         ("GET", "/products/2/images.json"): {"images": [{"id": 901}]}},
+    )
+
+    shop.copy_images(SRC, DUP)
+
+    assert shop.sess.documents == ["_PRODUCT_SET_FILES"]
+    assert shop.sess.rest_calls == [
+        ("GET", "/products/1/images.json"),
+        ("GET", "/products/2/images.json"),
+        ("DELETE", "/products/2/images/901.json"),
+        ("POST", "/products/2/images.json"),
+        ("POST", "/products/2/images.json"),
+    ]
+    assert shop.sess.rest_json == [
+        {"image": {"src": "https://cdn/a.jpg", "position": 1, "alt": ""}},
+        {"image": {"src": "https://cdn/b.jpg", "position": 2, "alt": ""}},
+    ]
+    assert any("fallback a REST" in r.getMessage() for r in caplog.records)
+
+
+# ---------------------------------------------------------------------------
+# delete_collects
+# ---------------------------------------------------------------------------
+def _collections_routes(user_errors: List[Dict[str, Any]]) -> Dict[str, Callable]:
+    return {
+        "_GET_PRODUCT_COLLECTIONS": lambda v: {"node": {"collections": {"edges": [
+            {"node": {"id": "gid://shopify/Collection/1", "ruleSet": None}},
+            {"node": {"id": "gid://shopify/Collection/2", "ruleSet": {"appliedDisjunctively": False}}},
+            {"node": {"id": "gid://shopify/Collection/3", "ruleSet": None}},
+        ]}}},
+        "_PRODUCT_LEAVE_COLLECTIONS": lambda v: {"productUpdate": {
+            "product": {"id": DUP}, "userErrors": user_errors}},
+    }
+
+
+def test_delete_collects_leaves_manual_collections_only(shop, caplog):
+    shop.sess = FakeSession(_collections_routes([]))
+
+    shop.delete_collects(DUP)
+
+    assert shop.sess.graphql_calls[1] == ("_PRODUCT_LEAVE_COLLECTIONS", {"input": {
+        "id": DUP,
+        "collectionsToLeave": ["gid://shopify/Collection/1", "gid://shopify/Collection/3"],
+    }})
+    assert shop.sess.rest_calls == []
+    assert not [r for r in caplog.records if r.levelname == "WARNING"]
+
+
+def test_delete_collects_surfaces_user_errors(shop, caplog):
+    shop.sess = FakeSession(_collections_routes([{"field": ["collectionsToLeave"], "message": "nope"}]))
+
+    shop.delete_collects(DUP)
+
+    warnings = [r.getMessage() for r in caplog.records if r.levelname == "WARNING"]
+    assert len(warnings) == 1 and "nope" in warnings[0]
+
+
+# ---------------------------------------------------------------------------
+# 429 handling
+# ---------------------------------------------------------------------------
+class _Throttled(FakeSession):
+    """First call of each kind answers 429 with a malformed Retry-After."""
+
+    def __init__(self, *a, **kw):
+        super().__init__(*a, **kw)
+        self.throttled = set()
+
+    def post(self, url, data=None, **kw):
+        if "post" not in self.throttled:
+            self.throttled.add("post")
+            return FakeResponse(429, headers={"Retry-After": "soon"})
+        return super().post(url, data=data, **kw)
+
+    def request(self, method, url, **kw):
+        if "request" not in self.throttled:
+            self.throttled.add("request")
+            return FakeResponse(429, headers={"Retry-After": "soon"})
+        return super().request(method, url, **kw)
+
+
+def test_throttled_waits_once_through_the_shared_cost_bucket(shop, monkeypatch):
+    sleeps: List[float] = []
+    monkeypatch.setattr(sync.time, "sleep", sleeps.append)
+    cost = {"requestedQueryCost": 202, "throttleStatus": {
+        "maximumAvailable": 2000.0, "currentlyAvailable": 2, "restoreRate": 100.0}}
+    replies = iter([
+        FakeResponse(body={"errors": [{"extensions": {"code": "THROTTLED"}}], "extensions": {"cost": cost}}),
+        FakeResponse(body={"data": {"node": None}}),
+    ])
+    shop.sess = FakeSession({"_GET_PRODUCT_METAFIELDS": lambda v: next(replies)})
+
+    assert shop.graphql(sync._GET_PRODUCT_METAFIELDS, {"id": DUP}) == {"node": None}
+    assert isinstance(shop._gql_bucket, sync.CostBucket)
+    assert sleeps == [pytest.approx(2.0)]
+
+
+def test_malformed_retry_after_is_retried_not_raised(shop):
+    shop.sess = _Throttled(_variants_routes(), {("GET", "/products/1/images.json"): _SRC_IMAGES})
+    assert shop.get_product_variants(DUP)
+    assert shop._get("/products/1/images.json") == _SRC_IMAGES
@@ -10,6 +10,7 @@ no-op, and the not-stocked activate+retry.
 """
 from __future__ import annotations
 
+import re
 from typing import Any, Callable, Dict, List, Union
 
 import pytest
@@ -147,6 +148,22 @@ def test_get_product_variants_raises_when_node_null():
         ops.get_product_variants(t, "gid://shopify/Product/404")
 
 
+def test_get_product_variant_prices_selects_only_price_fields():
+    n1 = {"id": "gid://shopify/ProductVariant/1", "price": "10.00", "compareAtPrice": None}
+    t = FakeTransport({"node": {"variants": {"edges": [{"node": n1}]}}})
+
+    assert ops.get_product_variant_prices(t, "gid://shopify/Product/1") == [n1]
+    q = t.calls[0]["query"]
+    assert "{ id price compareAtPrice }" in q
+    assert "selectedOptions" not in q and "inventoryItem" not in q
+
+
+def test_get_product_variant_prices_raises_when_node_null():
+    t = FakeTransport({"node": None})
+    with pytest.raises(RuntimeError, match="Product not found"):
+        ops.get_product_variant_prices(t, "gid://shopify/Product/404")
+
+
 # ---------------------------------------------------------------------------
 # product_variants_bulk_update  (+ variants_bulk_update_prices broadcast helper)
 # ---------------------------------------------------------------------------
@@ -335,6 +352,21 @@ def test_get_location_by_name_returns_none_on_miss():
     assert ops.get_location_by_name(t, "Nonexistent") is None
 
 
+def test_get_location_by_name_stops_paging_at_first_hit():
+    page1 = {"locations": {
+        "edges": [{"node": {"id": "gid://shopify/Location/1", "name": "Promo", "isActive": True}}],
+        "pageInfo": {"hasNextPage": True, "endCursor": "CUR1"},
+    }}
+    page2 = {"locations": {
+        "edges": [{"node": {"id": "gid://shopify/Location/2", "name": "Magazzino", "isActive": True}}],
+        "pageInfo": {"hasNextPage": False, "endCursor": None},
+    }}
+    t = FakeTransport([page1, page2])
+    node = ops.get_location_by_name(t, "Promo")
+    assert node["id"] == "gid://shopify/Location/1"
+    assert len(t.calls) == 1  # page 2 never requested
+
+
 # ---------------------------------------------------------------------------
 # inventory_activate
 # ---------------------------------------------------------------------------
@@ -418,6 +450,53 @@ def test_inventory_set_quantities_not_stocked_triggers_activate_then_retry():
     assert calls_order == ["set", "activate", "set"]  # single bounded retry
 
 
+def test_inventory_set_quantities_bulk_one_mutation_per_batch(monkeypatch):
+    monkeypatch.setattr(ops, "INVENTORY_SET_BATCH_SIZE", 2)
+    t = FakeTransport({"inventorySetQuantities": {"inventoryAdjustmentGroup": {"changes": []}, "userErrors": []}})
+    entries = [(f"gid://shopify/InventoryItem/{i}", "gid://shopify/Location/1", i) for i in range(3)]
+
+    ops.inventory_set_quantities_bulk(t, entries)
+
+    assert [len(c["variables"]["input"]["quantities"]) for c in t.calls] == [2, 1]
+    inp = t.calls[0]["variables"]["input"]
+    assert inp["name"] == "on_hand" and inp["ignoreCompareQuantity"] is True
+    assert inp["quantities"][1] == {
+        "inventoryItemId": "gid://shopify/InventoryItem/1",
+        "locationId": "gid://shopify/Location/1",
+        "quantity": 1,
+    }
+
+
+def test_inventory_set_quantities_bulk_empty_makes_no_call():
+    t = FakeTransport({})
+    ops.inventory_set_quantities_bulk(t, [])
+    assert t.calls == []
+
+
+def test_inventory_set_quantities_bulk_not_stocked_falls_back_per_entry():
+    calls_order: List[Any] = []
+
+    def route(query, variables):
+        if "inventorySetQuantities" in query:
+            n = len(variables["input"]["quantities"])
+            calls_order.append(("set", n))
+            if n > 1:
+                return {"inventorySetQuantities": {"inventoryAdjustmentGroup": None,
+                        "userErrors": [{"code": "ITEM_NOT_STOCKED_AT_LOCATION", "field": None, "message": "not stocked at location"}]}}
+            return {"inventorySetQuantities": {"inventoryAdjustmentGroup": {"changes": []}, "userErrors": []}}
+        raise AssertionError(f"unexpected query: {query}")
+
+    t = FakeTransport(route)
+    ops.inventory_set_quantities_bulk(t, [("i1", "l", 0), ("i2", "l", 4)])
+    assert calls_order == [("set", 2), ("set", 1), ("set", 1)]
+
+
+def test_inventory_set_quantities_bulk_raises_on_other_user_errors_fix3():
+    t = FakeTransport({"inventorySetQuantities": {"inventoryAdjustmentGroup": None, "userErrors": [{"code": "INVALID", "field": "quantity", "message": "nope"}]}})
+    with pytest.raises(ShopifyUserError):
+        ops.inventory_set_quantities_bulk(t, [("i1", "l", 0), ("i2", "l", 1)])
+
+
 # ---------------------------------------------------------------------------
 # inventory_deactivate  (+ get_inventory_level_id)
 # ---------------------------------------------------------------------------
@@ -458,6 +537,13 @@ def test_inventory_deactivate_happy_path():
     assert deact["variables"] == {"inventoryLevelId": "gid://shopify/InventoryLevel/9"}
 
 
+def test_inventory_deactivate_with_known_level_id_skips_lookup():
+    t = FakeTransport({"inventoryDeactivate": {"userErrors": []}})
+    assert ops.inventory_deactivate(t, "i", "l", "gid://shopify/InventoryLevel/9") is None
+    assert len(t.calls) == 1
+    assert t.calls[0]["variables"] == {"inventoryLevelId": "gid://shopify/InventoryLevel/9"}
+
+
 def test_inventory_deactivate_raises_on_user_errors_fix3():
     def route(query, _variables):
         if "inventoryDeactivate" in query:
@@ -467,3 +553,59 @@ def test_inventory_deactivate_raises_on_user_errors_fix3():
     t = FakeTransport(route)
     with pytest.raises(ShopifyUserError):
         ops.inventory_deactivate(t, "i", "l")
+
+
+def test_inventory_deactivate_bulk_one_aliased_document_per_batch(monkeypatch):
+    monkeypatch.setattr(ops, "INVENTORY_DEACTIVATE_BATCH_SIZE", 2)
+    t = FakeTransport(lambda q, v: {f"d{j}": {"userErrors": []} for j in range(len(v))})
+    levels = [f"gid://shopify/InventoryLevel/{i}" for i in range(3)]
+    assert ops.inventory_deactivate_bulk(t, levels) is None
+    assert [c["variables"] for c in t.calls] == [
+        {"l0": levels[0], "l1": levels[1]},
+        {"l0": levels[2]},
+    ]
+    assert t.calls[0]["query"].count("inventoryDeactivate(inventoryLevelId:") == 2
+    assert "d1: inventoryDeactivate(inventoryLevelId: $l1)" in t.calls[0]["query"]
+
+
+def test_inventory_deactivate_bulk_empty_is_noop():
+    t = FakeTransport({})
+    ops.inventory_deactivate_bulk(t, [])
+    assert t.calls == []
+
+
+def test_inventory_deactivate_bulk_raises_on_any_alias_user_errors_fix3():
+    err = {"field": ["inventoryLevelId"], "message": "has stock"}
+    t = FakeTransport({"d0": {"userErrors": []}, "d1": {"userErrors": [err]}})
+    with pytest.raises(ShopifyUserError) as exc:
+        ops.inventory_deactivate_bulk(t, ["a", "b"])
+    assert exc.value.errors == [err]
+
+
+# ---------------------------------------------------------------------------
+# static query-document checks (client-side, once, off the hot path)
+# ---------------------------------------------------------------------------
+
+def _query_constants():
+    from backend.services import resolvers
+
+    for module in (ops, resolvers):
+        for name, value in vars(module).items():
+            if name.startswith("_") and name.isupper() and isinstance(value, str):
+                yield f"{module.__name__}.{name}", value
+
+
+_OPERATION_HEADER = re.compile(r"\s*(query|mutation)\s*(?:\(([^)]*)\))?\s*\{")
+
+
+@pytest.mark.parametrize("name,doc", list(_query_constants()))
+def test_query_document_variables_match_header(name, doc):
+    """Every ``$var`` used in the body is declared in the operation header and
+    every declared one is used (the server rejects both), and braces balance —
+    catches a typo'd document here instead of as a live-store GraphQL error."""
+    m = _OPERATION_HEADER.match(doc)
+    assert m, f"{name}: not a query/mutation document"
+    declared = set(re.findall(r"\$(\w+)\s*:", m.group(2) or ""))
+    used = set(re.findall(r"\$(\w+)", doc[m.end():]))
+    assert used == declared, name
+    assert doc.count("{") == doc.count("}"), name
@@ -9,7 +9,9 @@ test_ops.py (no HTTP, no live store):
 * product_delete — deletedProductId happy path + fix3 userErrors -> raise;
 * get_online_store_publication_id / product_publish — resolve + publish happy
   path, missing-channel fail-closed, and fix3 userErrors -> raise;
-* enumerate_outlet_products — multi-page pagination + null-collection raise.
+* enumerate_outlet_products — multi-page pagination + null-collection raise;
+* get_product_bundle — one fused read (core + variants + metafields + media),
+  per-connection overflow fallback, null raise.
 """
 from __future__ import annotations
 
@@ -54,6 +56,7 @@ def _levels(*quantity_maps: Dict[str, int], has_next: bool = False) -> Dict[str,
     for i, qmap in enumerate(quantity_maps, start=1):
         nodes.append(
             {
+                "id": f"gid://shopify/InventoryLevel/{i}",
                 "location": {"id": f"gid://shopify/Location/{i}", "name": f"Loc{i}"},
                 "quantities": [{"name": n, "quantity": q} for n, q in qmap.items()],
             }
@@ -92,6 +95,7 @@ def test_read_variant_inventory_policy_and_per_location_quantities():
     # single present location, KNOWN available == 0 (a real zero, not fabricated)
     assert len(v["levels"]) == 1
     lvl = v["levels"][0]
+    assert lvl["level_id"] == "gid://shopify/InventoryLevel/1"  # reused by inventory_deactivate
     assert lvl["location_id"] == "gid://shopify/Location/1"
     assert lvl["available"] == 0
     assert lvl["on_hand"] == 5
@@ -275,3 +279,104 @@ def test_enumerate_outlet_products_raises_when_collection_null():
     t = FakeTransport({"collection": None})
     with pytest.raises(RuntimeError, match="Collection not found"):
         ops.enumerate_outlet_products(t, "gid://shopify/Collection/404")
+
+
+def test_iter_outlet_products_is_lazy_across_pages():
+    page1 = {"collection": {"id": ops.OUTLET_COLLECTION_GID, "products": {
+        "pageInfo": {"hasNextPage": True, "endCursor": "CUR1"},
+        "nodes": [{"id": "gid://shopify/Product/1", "title": "Nike - Outlet", "status": "ACTIVE"}],
+    }}}
+    page2 = {"collection": {"id": ops.OUTLET_COLLECTION_GID, "products": {
+        "pageInfo": {"hasNextPage": False, "endCursor": None},
+        "nodes": [{"id": "gid://shopify/Product/2", "title": "Vans - Outlet", "status": "DRAFT"}],
+    }}}
+    t = FakeTransport([page1, page2])
+
+    it = ops.iter_outlet_products(t)
+    assert t.calls == []  # nothing fetched until iterated
+    assert next(it)["id"] == "gid://shopify/Product/1"
+    assert len(t.calls) == 1
+    assert [p["id"] for p in it] == ["gid://shopify/Product/2"]
+    assert len(t.calls) == 2
+
+
+# ---------------------------------------------------------------------------
+# get_product_bundle (fused variants + metafields + media)
+# ---------------------------------------------------------------------------
+
+_BUNDLE_VARIANT = {
+    "id": "gid://shopify/ProductVariant/1", "sku": "SKU-42", "title": "42",
+    "price": "50.00", "compareAtPrice": "100.00",
+    "inventoryItem": {"id": "gid://shopify/InventoryItem/1"},
+    "selectedOptions": [{"name": "Size", "value": "42"}],
+}
+_BUNDLE_MF = {"namespace": "custom", "key": "k", "type": "single_line_text_field", "value": "x"}
+
+
+def _bundle_product(variants_next=False, mf_next=False, media_next=False):
+    return {"product": {
+        "id": "gid://shopify/Product/1", "title": "Nike - Outlet", "handle": "nike-outlet",
+        "status": "DRAFT", "tags": ["outlet"],
+        "collections": {"pageInfo": {"hasNextPage": False}, "nodes": [
+            {"id": "gid://shopify/Collection/9", "title": "OUTLET", "handle": "outlet",
+             "ruleSet": {"appliedDisjunctively": False}},
+        ]},
+        "variants": {"pageInfo": {"hasNextPage": variants_next}, "nodes": [_BUNDLE_VARIANT]},
+        "metafields": {"pageInfo": {"hasNextPage": mf_next}, "nodes": [_BUNDLE_MF]},
+        "media": {"pageInfo": {"hasNextPage": media_next}, "nodes": [
+            {"id": "m1", "alt": "", "image": {"url": "https://cdn/1.jpg"}},
+            {},  # non-image media -> empty inline-fragment node, dropped
+        ]},
+    }}
+
+
+def test_get_product_bundle_one_call_same_shapes_as_single_ops():
+    t = FakeTransport(_bundle_product())
+    out = ops.get_product_bundle(t, "gid://shopify/Product/1")
+    assert len(t.calls) == 1
+    assert t.calls[0]["variables"] == {"id": "gid://shopify/Product/1", "first": ops.BUNDLE_PAGE_SIZE}
+    assert out["variants"] == [_BUNDLE_VARIANT]
+    assert out["metafields"] == [_BUNDLE_MF]
+    assert out["media"] == ["https://cdn/1.jpg"]
+    assert out["core"] == {
+        "id": "gid://shopify/Product/1", "title": "Nike - Outlet", "handle": "nike-outlet",
+        "status": "DRAFT", "tags": ["outlet"],
+        "collections": [{"id": "gid://shopify/Collection/9", "title": "OUTLET",
+                         "handle": "outlet", "smart": True}],
+    }
+
+
+def test_get_product_bundle_overflowing_connection_falls_back_to_dedicated_op():
+    full_mf = [dict(_BUNDLE_MF, key=f"k{i}") for i in range(3)]
+
+    def route(query, variables):
+        if "metafields(first: 250)" in query:
+            return {"node": {"metafields": {"edges": [{"node": m} for m in full_mf]}}}
+        return _bundle_product(mf_next=True)
+
+    t = FakeTransport(route)
+    out = ops.get_product_bundle(t, "gid://shopify/Product/1")
+    assert len(t.calls) == 2  # bundle + the metafields-only re-read
+    assert out["metafields"] == full_mf
+    assert out["variants"] == [_BUNDLE_VARIANT]
+
+
+def test_get_product_bundle_with_known_core_skips_core_part():
+    core = {"id": "gid://shopify/Product/1", "title": "Nike - Outlet", "handle": "nike-outlet",
+            "status": "DRAFT", "tags": [], "collections": []}
+    product = _bundle_product()["product"]
+    for field in ("title", "handle", "status", "tags", "collections"):
+        del product[field]  # @include(if: $withCore) false -> absent
+    t = FakeTransport({"product": product})
+    out = ops.get_product_bundle(t, "gid://shopify/Product/1", core=core)
+    assert len(t.calls) == 1
+    assert t.calls[0]["variables"]["withCore"] is False
+    assert "@include(if: $withCore)" in t.calls[0]["query"]
+    assert out["core"] is core
+    assert out["variants"] == [_BUNDLE_VARIANT]
+
+
+def test_get_product_bundle_raises_when_product_null():
+    t = FakeTransport({"product": None})
+    with pytest.raises(RuntimeError, match="Product not found"):
+        ops.get_product_bundle(t, "gid://shopify/Product/404")
@@ -52,7 +52,7 @@ def _row(sku, size, qta, *, reconciled=False, product_id="",
 
 
 def _level(loc_id, available, on_hand=None):
-    return {"location_id": loc_id, "location_name": loc_id.split("/")[-1],
+    return {"level_id": f"lvl:{loc_id}", "location_id": loc_id, "location_name": loc_id.split("/")[-1],
             "available": available, "committed": 0,
             "on_hand": available if on_hand is None else on_hand}
 
@@ -118,14 +118,19 @@ class OpsMock:
         # gid -> Exception instance to raise instead of returning inventory
         # (fix3 error-isolation coverage: e.g. a RuntimeError mid-execution).
         self.read_inv_raises: Dict[str, Exception] = read_inv_raises or {}
+        self.bulk_sets: List[int] = []
+        self.deactivated_level_ids: List[Optional[str]] = []
 
-        monkeypatch.setattr(resolvers, "outlet_resolver", lambda t, sku: self.outlet_by_sku.get(sku, self.outlet))
-        monkeypatch.setattr(resolvers, "source_resolver", lambda t, sku: self.source_by_sku.get(sku, self.source))
+        monkeypatch.setattr(resolvers, "prefetch_candidates", lambda t, skus: {})
+        monkeypatch.setattr(resolvers, "outlet_resolver", lambda t, sku, prefetched=None: self.outlet_by_sku.get(sku, self.outlet))
+        monkeypatch.setattr(resolvers, "source_resolver", lambda t, sku, prefetched=None: self.source_by_sku.get(sku, self.source))
         monkeypatch.setattr(ops, "product_duplicate", self._duplicate)
         monkeypatch.setattr(ops, "read_variant_inventory", self._read_inv)
         monkeypatch.setattr(ops, "get_product_variants", self._get_variants)
         monkeypatch.setattr(ops, "inventory_set_quantities", self._set_qty)
+        monkeypatch.setattr(ops, "inventory_set_quantities_bulk", self._set_qty_bulk)
         monkeypatch.setattr(ops, "inventory_deactivate", self._deactivate)
+        monkeypatch.setattr(ops, "inventory_activate", self._activate)
         monkeypatch.setattr(ops, "product_variants_bulk_update", self._bulk)
         monkeypatch.setattr(ops, "product_update_status", self._status)
         monkeypatch.setattr(ops, "product_publish", self._publish)
@@ -152,9 +157,20 @@ class OpsMock:
     def _set_qty(self, t, item, loc, qty, *a, **k):
         self.calls.append(("inventory_set_quantities", item, loc, qty)); return {}
 
-    def _deactivate(self, t, item, loc):
+    def _set_qty_bulk(self, t, quantities):
+        # recorded per entry (same effect as N single sets); the batch count is
+        # kept separately for the round-trip assertions.
+        self.bulk_sets.append(len(quantities))
+        for item, loc, qty in quantities:
+            self._set_qty(t, item, loc, qty)
+
+    def _deactivate(self, t, item, loc, level_id=None):
+        self.deactivated_level_ids.append(level_id)
         self.calls.append(("inventory_deactivate", item, loc)); return None
 
+    def _activate(self, t, item, loc, on_hand=None):
+        self.calls.append(("inventory_activate", item, loc, on_hand)); return {}
+
     def _bulk(self, t, gid, variants):
         self.calls.append(("product_variants_bulk_update", gid, variants)); return {}
 
@@ -260,6 +276,49 @@ def test_create_isolates_returned_size_only(monkeypatch):
     assert ("inventory_set_quantities", "gid/DUP/i43", PROMO, 0) in m.calls
 
 
+def test_create_inventory_sets_are_batched_mutations(monkeypatch):
+    rows = [_row("SKU1", "42", 2), _row("SKU1", "43", 1)]
+    sheet = FakeSheet(rows)
+    m = OpsMock(
+        monkeypatch,
+        source={"matches": [_source_match("gid://shopify/Product/SRC")], "warning": None},
+        source_variants=[_src_variant("V42", "42", "IIT42"), _src_variant("V43", "43", "IIT43")],
+        inv_by_gid={"gid://shopify/Product/DUP": _dup_inv_two_sizes()},
+    )
+    plan = outlet_service.publish_preview(sheet, object(), promo_location_id=PROMO)
+    outlet_service.publish_apply(sheet, object(), plan, promo_location_id=PROMO)
+
+    # (2) inherited Magazzino zeros, (3) Promo zeros, (4) deltas: ONE call each
+    assert m.bulk_sets == [2, 2, 2]
+    assert len(sheet.marked) == 2
+    # disconnects reuse the level ids of the inventory read (no per-level lookup)
+    assert m.deactivated_level_ids == [f"lvl:{MAG}", f"lvl:{MAG}"]
+
+
+def test_create_connects_sizes_missing_at_promo_at_zero(monkeypatch):
+    rows = [_row("SKU1", "42", 2), _row("SKU1", "43", 1)]
+    sheet = FakeSheet(rows)
+    m = OpsMock(
+        monkeypatch,
+        source={"matches": [_source_match("gid://shopify/Product/SRC")], "warning": None},
+        source_variants=[_src_variant("V42", "42", "IIT42"), _src_variant("V43", "43", "IIT43")],
+        inv_by_gid={"gid://shopify/Product/DUP": [
+            _inv_variant("gid/DUP/v42", "42", "gid/DUP/i42", [_level(PROMO, 5), _level(MAG, 3)]),
+            _inv_variant("gid/DUP/v43", "43", "gid/DUP/i43", [_level(MAG, 3)]),  # not at Promo
+        ]},
+    )
+    plan = outlet_service.publish_preview(sheet, object(), promo_location_id=PROMO)
+    outlet_service.publish_apply(sheet, object(), plan, promo_location_id=PROMO)
+
+    # the unstocked size is connected at on_hand=0 up front; only the stocked one
+    # goes through the Promo zeroing batch
+    assert [c for c in m.calls if c[0] == "inventory_activate"] == [
+        ("inventory_activate", "gid/DUP/i43", PROMO, 0)
+    ]
+    assert m.bulk_sets == [2, 1, 2]
+    assert ("inventory_set_quantities", "gid/DUP/i43", PROMO, 1) in m.calls
+
+
 # ---------------------------------------------------------------------------
 # 3) ACTIVE — a reconciled row is never re-applied (no re-inflate)
 # ---------------------------------------------------------------------------
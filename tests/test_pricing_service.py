@@ -95,7 +95,7 @@ class OpsMock:
             {"id": g, "title": g, "status": s} for g, s in self.status_by_gid.items()
         ]
         monkeypatch.setattr(ops, "enumerate_outlet_products", self._enumerate)
-        monkeypatch.setattr(ops, "get_product_variants", self._get_variants)
+        monkeypatch.setattr(ops, "get_product_variant_prices", self._get_variants)
         monkeypatch.setattr(ops, "product_variants_bulk_update", self._bulk)
 
     def _enumerate(self, t, collection_gid=ops.OUTLET_COLLECTION_GID):
@@ -12,6 +12,7 @@ from typing import Any, Callable, Dict, List, Optional, Union
 from backend.services.resolvers import (
     OUTLET_COLLECTION_GID,
     outlet_resolver,
+    prefetch_candidates,
     source_resolver,
 )
 
@@ -234,3 +235,44 @@ def test_query_passes_sku_as_variable_and_escapes():
     # sku value is a VARIABLE, never interpolated into the document
     assert "$q: String!" in captured["query"]
     assert "AB'C" not in captured["query"]
+
+
+# ---------------------------------------------------------------------------
+# prefetch_candidates: K SKUs -> one OR-ed query, exact semantics preserved
+# ---------------------------------------------------------------------------
+
+def test_prefetch_batches_skus_into_one_or_query():
+    a = _product_node("gid://shopify/Product/A", "Nike", "nike", "ACTIVE", False, ["AAA"])
+    b_out = _product_node("gid://shopify/Product/B", "Puma - Outlet", "puma-outlet", "ACTIVE", True, ["BBB"])
+    t = FakeTransport(_products_response([a, b_out]))
+
+    pre = prefetch_candidates(t, ["AAA", "BBB", "AAA"])
+
+    assert len(t.calls) == 1
+    assert t.calls[0]["variables"]["q"] == "(sku:AAA) OR (sku:BBB)"
+    # Each SKU's entry drives the resolvers with no further call.
+    assert [m["product_gid"] for m in source_resolver(t, "AAA", pre["AAA"])["matches"]] == [
+        "gid://shopify/Product/A"
+    ]
+    assert [m["product_gid"] for m in outlet_resolver(t, "BBB", pre["BBB"])["matches"]] == [
+        "gid://shopify/Product/B"
+    ]
+    assert len(t.calls) == 1
+
+
+def test_prefetch_falls_back_per_sku_when_union_truncated_or_no_exact():
+    a = _product_node("gid://shopify/Product/A", "Nike", "nike", "ACTIVE", False, ["AAA"])
+
+    def responder(query: str, variables: Dict[str, Any]) -> Dict[str, Any]:
+        if " OR " in variables["q"]:
+            return _products_response([a], has_next=True)
+        if variables["q"] == "sku:AAA":
+            return _products_response([a])
+        return _products_response([])
+
+    t = FakeTransport(responder)
+    pre = prefetch_candidates(t, ["AAA", "ZZZ"])
+
+    assert [c["variables"]["q"] for c in t.calls] == ["(sku:AAA) OR (sku:ZZZ)", "sku:AAA", "sku:ZZZ"]
+    assert pre["AAA"][1] == {"server_count": 1, "truncated": False}
+    assert pre["ZZZ"] == ([], {"server_count": 0, "truncated": False})
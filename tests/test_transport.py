@@ -5,6 +5,8 @@ All HTTP is mocked at the requests.Session method level (``transport.sess.post``
 """
 from __future__ import annotations
 
+import json
+import socket
 from typing import Any, Dict, Optional
 from unittest.mock import MagicMock
 
@@ -59,6 +61,90 @@ def test_every_call_passes_timeout_kwarg(transport):
     assert kwargs["timeout"] == 30
 
 
+def test_body_is_prebuilt_json_bytes(transport):
+    ok = FakeResponse(200, json_body={"data": {"ok": True}})
+    transport.sess.post = MagicMock(return_value=ok)
+
+    transport.graphql('query($id: ID!) { node(id: $id) { id } }', {"id": "gid://x/\u00e8"})
+
+    _, kwargs = transport.sess.post.call_args
+    assert isinstance(kwargs["data"], bytes)
+    assert json.loads(kwargs["data"]) == {
+        "query": 'query($id: ID!) { node(id: $id) { id } }',
+        "variables": {"id": "gid://x/\u00e8"},
+    }
+    assert transport.sess.headers["Content-Type"] == "application/json"
+
+
+def test_query_whitespace_compacted_but_string_literals_kept(transport):
+    ok = FakeResponse(200, json_body={"data": {"ok": True}})
+    transport.sess.post = MagicMock(return_value=ok)
+
+    transport.graphql('query {\n  products(query: "a  b") {\n    id\n  }\n}\n', {})
+
+    _, kwargs = transport.sess.post.call_args
+    assert json.loads(kwargs["data"])["query"] == 'query { products(query: "a  b") { id } }'
+
+
+def test_https_connections_enable_tcp_keepalive(transport):
+    adapter = transport.sess.get_adapter(transport.graphql_url)
+    opts = adapter.poolmanager.connection_pool_kw["socket_options"]
+    assert (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1) in opts
+    assert (socket.IPPROTO_TCP, socket.TCP_NODELAY, 1) in opts  # urllib3 default kept
+
+
+def test_throttle_measures_on_monotonic_clock(transport, monkeypatch):
+    """A wall-clock jump (NTP step) must neither stall nor skip the throttle."""
+    sleeps = []
+    monkeypatch.setattr("backend.shopify.transport.time.sleep", lambda s: sleeps.append(s))
+    monkeypatch.setattr("backend.shopify.transport.time.monotonic", lambda: 100.2)
+    transport.min_interval = 0.7
+    transport._last_call_ts = 100.0
+
+    transport._throttle()
+
+    assert sleeps == [pytest.approx(0.5)]
+
+
+def test_throttle_paces_known_query_cost_against_bucket(transport, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr("backend.shopify.transport.time.sleep", lambda s: sleeps.append(s))
+    clock = [10.0]
+    monkeypatch.setattr("backend.shopify.transport.time.monotonic", lambda: clock[0])
+    ok = FakeResponse(200, json_body={
+        "data": {"ok": True},
+        "extensions": {"cost": {
+            "requestedQueryCost": 100,
+            "throttleStatus": {"maximumAvailable": 2000.0, "currentlyAvailable": 40, "restoreRate": 100.0},
+        }},
+    })
+    transport.sess.post = MagicMock(return_value=ok)
+
+    transport.graphql("query A {}", {})      # cost unknown yet: no pacing
+    assert sleeps == []
+    clock[0] = 10.2                           # bucket projected at 40 + 0.2*100 = 60
+    transport.graphql("query A {}", {})
+    assert sleeps == [pytest.approx(0.4)]     # (100 - 60) / 100
+    transport.graphql("query B {}", {})       # other document, cost unknown
+    assert len(sleeps) == 1
+
+
+def test_known_cost_with_room_skips_min_interval_and_debits_bucket(transport, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr("backend.shopify.transport.time.sleep", lambda s: sleeps.append(s))
+    clock = [10.0]
+    monkeypatch.setattr("backend.shopify.transport.time.monotonic", lambda: clock[0])
+    transport.min_interval = 0.7
+    transport._costs.query_costs["query A {}"] = 100.0
+    transport._costs.state = (250.0, 100.0, 10.0, 2000.0)
+
+    transport._throttle("query A {}")       # 250 available: no fixed interval
+    transport._throttle("query A {}")       # 150 left after the first debit
+    assert sleeps == []
+    transport._throttle("query A {}")       # 50 left: wait for 50 more points
+    assert sleeps == [pytest.approx(0.5)]
+
+
 def test_retries_on_429_then_succeeds_respecting_retry_after(transport, monkeypatch):
     sleeps = []
     monkeypatch.setattr("backend.shopify.transport.time.sleep", lambda s: sleeps.append(s))
@@ -74,6 +160,87 @@ def test_retries_on_429_then_succeeds_respecting_retry_after(transport, monkeypa
     assert 3.0 in sleeps
 
 
+def test_malformed_retry_after_falls_back_to_default(transport, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr("backend.shopify.transport.time.sleep", lambda s: sleeps.append(s))
+
+    throttled = FakeResponse(429, headers={"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"})
+    ok = FakeResponse(200, json_body={"data": {"ok": True}})
+    transport.sess.post = MagicMock(side_effect=[throttled, ok])
+
+    assert transport.graphql("query {}", {}) == {"ok": True}
+    assert 2.0 in sleeps
+
+
+def test_503_honors_retry_after_over_backoff(transport, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr("backend.shopify.transport.time.sleep", lambda s: sleeps.append(s))
+
+    unavailable = FakeResponse(503, headers={"Retry-After": "5"}, text="maintenance")
+    ok = FakeResponse(200, json_body={"data": {"ok": True}})
+    transport.sess.post = MagicMock(side_effect=[unavailable, ok])
+
+    assert transport.graphql("query {}", {}) == {"ok": True}
+    assert 5.0 in sleeps
+
+
+def _throttled_body(cost=None):
+    body = {"errors": [{"message": "Throttled", "extensions": {"code": "THROTTLED"}}]}
+    if cost is not None:
+        body["extensions"] = {"cost": cost}
+    return FakeResponse(200, json_body=body)
+
+
+def test_graphql_throttled_waits_for_bucket_refill_then_retries(transport, monkeypatch):
+    sleeps = []
+    clock = [50.0]
+
+    def fake_sleep(seconds):
+        sleeps.append(seconds)
+        clock[0] += seconds
+
+    monkeypatch.setattr("backend.shopify.transport.time.sleep", fake_sleep)
+    monkeypatch.setattr("backend.shopify.transport.time.monotonic", lambda: clock[0])
+    throttled = _throttled_body({
+        "requestedQueryCost": 202,
+        "throttleStatus": {"maximumAvailable": 2000.0, "currentlyAvailable": 2, "restoreRate": 100.0},
+    })
+    ok = FakeResponse(200, json_body={"data": {"ok": True}})
+    transport.sess.post = MagicMock(side_effect=[throttled, ok])
+
+    assert transport.graphql("query {}", {}) == {"ok": True}
+    assert sleeps == [pytest.approx(2.0)]
+
+
+def test_graphql_throttled_waits_once_per_throttle_event(transport, monkeypatch):
+    """The retry's own _throttle must not wait again for the refill the
+    THROTTLED branch already slept for (clock frozen: only the credit counts)."""
+    sleeps = []
+    monkeypatch.setattr("backend.shopify.transport.time.sleep", lambda s: sleeps.append(s))
+    monkeypatch.setattr("backend.shopify.transport.time.monotonic", lambda: 50.0)
+    throttled = _throttled_body({
+        "requestedQueryCost": 202,
+        "throttleStatus": {"maximumAvailable": 2000.0, "currentlyAvailable": 2, "restoreRate": 100.0},
+    })
+    ok = FakeResponse(200, json_body={"data": {"ok": True}})
+    transport.sess.post = MagicMock(side_effect=[throttled, ok])
+
+    assert transport.graphql("query {}", {}) == {"ok": True}
+    assert sleeps == [pytest.approx(2.0)]
+
+
+def test_graphql_throttled_without_cost_backs_off_then_raises(transport, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr("backend.shopify.transport.time.sleep", lambda s: sleeps.append(s))
+    transport.max_retries = 3
+    transport.sess.post = MagicMock(return_value=_throttled_body())
+
+    with pytest.raises(ShopifyTransportError, match="THROTTLED"):
+        transport.graphql("query {}", {})
+
+    assert sleeps == [1, 2, 4]
+
+
 def test_retries_then_aborts_on_persistent_5xx(transport, monkeypatch):
     monkeypatch.setattr("backend.shopify.transport.time.sleep", lambda s: None)
     transport.max_retries = 3